@@ -0,0 +1,216 @@
+"""
+Benchmark suite for the Python data pipeline
+
+Runs the pipeline stages at several member counts against the synthetic
+provider master (synthetic_providers.py) and records wall time and peak RSS for each stage:
+
+- generate: generate_sample_data.py (CSV / JSON / state, no Excel workbook)
+- score:    calculate_ivi_scores over the generated tables
+- powerbi:  create_powerbi_files.py (workbook, CSVs, data model)
+
+Every stage runs in a fresh Python process so its peak RSS is its own.
+Results are compared with a stored baseline (benchmarks/baseline.json next
+to this script) and any stage slower or larger than the baseline by more
+than the tolerance is flagged; the exit status is 1 when something
+regressed. Baselines are machine specific, so record one on the machine
+that runs the comparison, and re-record the committed one (--save-baseline)
+in the change that deliberately alters a stage's cost.
+
+Usage:
+    python scripts/benchmark_pipeline.py                        # 1k, 10k, 100k members vs baseline
+    python scripts/benchmark_pipeline.py --sizes 1000 10000 --stages generate score
+    python scripts/benchmark_pipeline.py --save-baseline        # record a new baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from run_report import peak_rss_mb
+from synthetic_providers import SYNTHETIC
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(SCRIPT_DIR, "benchmarks", "baseline.json")
+
+STAGES = ["generate", "score", "powerbi"]
+DEFAULT_SIZES = [1000, 10000, 100000]
+TIME_TOLERANCE = 0.25
+RSS_TOLERANCE = 0.15
+MIN_TIME_DELTA = 0.05  # seconds; smaller slowdowns are timer noise
+
+
+def _size_dirs(work_dir, members):
+    base = os.path.join(work_dir, f"members_{members}")
+    return os.path.join(base, "data"), os.path.join(base, "powerbi")
+
+
+def run_stage(stage, members, work_dir, providers_path):
+    """Run one stage in this process; returns its wall time in seconds"""
+    sys.path.insert(0, SCRIPT_DIR)
+    data_dir, powerbi_dir = _size_dirs(work_dir, members)
+
+    if stage == "generate":
+        import generate_sample_data
+        argv = ["--members", str(members), "--providers", providers_path, "--output-dir", data_dir,
+                "--excel", "none"]
+        start = time.perf_counter()
+        generate_sample_data.main(argv)
+        return time.perf_counter() - start
+
+    if stage == "score":
+        from ivi_incremental import BATCH_COLUMNS
+        from ivi_scoring import calculate_ivi_scores
+        inputs = (
+            pd.read_csv(f"{data_dir}/corporate_clients.csv"),
+            pd.read_csv(f"{data_dir}/members.csv", usecols=BATCH_COLUMNS["members"]),
+            pd.read_csv(f"{data_dir}/claims.csv", usecols=BATCH_COLUMNS["claims"]),
+            pd.read_csv(f"{data_dir}/preauthorizations.csv", usecols=BATCH_COLUMNS["preauths"]),
+            pd.read_csv(f"{data_dir}/calls.csv", usecols=BATCH_COLUMNS["calls"]),
+        )
+        start = time.perf_counter()
+        calculate_ivi_scores(*inputs)
+        return time.perf_counter() - start
+
+    if stage == "powerbi":
+        from create_powerbi_files import create_powerbi_files
+        start = time.perf_counter()
+        create_powerbi_files(data_dir, powerbi_dir, providers_path, public_copy=None)
+        return time.perf_counter() - start
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def measure(stage, members, work_dir, providers_path):
+    """Run a stage in a child process and collect its time and peak RSS"""
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-stage", stage, "--members", str(members),
+           "--work-dir", work_dir, "--providers", providers_path]
+    # Each run gets a cold, private input cache (see data_cache.py)
+    env = dict(os.environ, IVI_CACHE_DIR=os.path.join(work_dir, "cache", f"{stage}-{members}"))
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{stage} at {members:,} members failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_suite(sizes, stages, work_dir, repeat=1):
+    """Best of `repeat` runs per stage and size: {"<stage>/<members>": {...}}"""
+    providers_path = SYNTHETIC
+    results = {}
+    for members in sizes:
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            runs = [measure(stage, members, work_dir, providers_path) for _ in range(repeat)]
+            best = min(runs, key=lambda r: r["seconds"])
+            best["peak_rss_mb"] = min(r["peak_rss_mb"] for r in runs) if best["peak_rss_mb"] is not None else None
+            results[f"{stage}/{members}"] = best
+            rss = f"{best['peak_rss_mb']:.0f} MB" if best["peak_rss_mb"] is not None else "n/a"
+            print(f"  {stage:<9} {members:>9,} members  {best['seconds']:>8.2f}s  {rss:>8}")
+    return results
+
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, rss_tolerance=RSS_TOLERANCE):
+    """Lines describing every result that regressed against the baseline"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+
+        if (current["seconds"] > previous["seconds"] * (1 + time_tolerance)
+                and current["seconds"] - previous["seconds"] > MIN_TIME_DELTA):
+            regressions.append(f"{key}: {current['seconds']:.2f}s vs {previous['seconds']:.2f}s baseline "
+                               f"(+{(current['seconds'] / previous['seconds'] - 1) * 100:.0f}%)")
+
+        if current.get("peak_rss_mb") and previous.get("peak_rss_mb") \
+                and current["peak_rss_mb"] > previous["peak_rss_mb"] * (1 + rss_tolerance):
+            regressions.append(f"{key}: peak RSS {current['peak_rss_mb']:.0f} MB vs "
+                               f"{previous['peak_rss_mb']:.0f} MB baseline "
+                               f"(+{(current['peak_rss_mb'] / previous['peak_rss_mb'] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the IVI data pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Member counts to benchmark (default: 1000 10000 100000)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES,
+                        help="Stages to run; score and powerbi need generate's output in --work-dir")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage and size, best one kept (default: 3)")
+    parser.add_argument("--work-dir", default=None, help="Directory for generated data (default: temporary)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON file")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE,
+                        help=f"Allowed slowdown before flagging as a fraction (default: {TIME_TOLERANCE})")
+    parser.add_argument("--rss-tolerance", type=float, default=RSS_TOLERANCE,
+                        help=f"Allowed peak RSS growth before flagging as a fraction (default: {RSS_TOLERANCE})")
+    # Internal: run a single stage in this process and print its measurements
+    parser.add_argument("--run-stage", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--members", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--providers", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        # Stage output goes to stderr so stdout carries only the measurements
+        stdout, sys.stdout = sys.stdout, sys.stderr
+        seconds = run_stage(args.run_stage, args.members, args.work_dir, args.providers)
+        sys.stdout = stdout
+        peak = peak_rss_mb()
+        print(json.dumps({"seconds": round(seconds, 3), "peak_rss_mb": round(peak, 1) if peak is not None else None}))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="ivi-bench-") as tmp_dir:
+        work_dir = os.path.abspath(args.work_dir or tmp_dir)
+        os.makedirs(work_dir, exist_ok=True)
+        print(f"IVI pipeline benchmark ({', '.join(args.stages)}; best of {args.repeat})")
+        results = run_suite(args.sizes, args.stages, work_dir, repeat=args.repeat)
+
+    report = {"created_at": datetime.now().isoformat(), "machine": machine_info(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Saved: {args.output}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Saved baseline: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], args.time_tolerance, args.rss_tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against the baseline from {baseline['created_at']}:")
+        for line in regressions:
+            print(f"  ✗ {line}")
+        sys.exit(1)
+    print(f"\nNo regressions against the baseline from {baseline['created_at']}")
+
+
+if __name__ == "__main__":
+    main()
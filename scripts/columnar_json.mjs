@@ -0,0 +1,104 @@
+// Encoder / decoder for the columnar, dictionary-encoded JSON written by columnar_json.py
+//
+// A table is { format: 'columnar', version: 1, rows, columns, data } where
+// data[column] is either a plain value array or { dict, codes } (codes index
+// into dict, null = missing). A 'columnar-tables' file holds several tables
+// under `tables`. Files may be precompressed (.gz / .br).
+import fs from 'fs';
+import zlib from 'zlib';
+
+const FORMAT = 'columnar';
+const TABLES_FORMAT = 'columnar-tables';
+const VERSION = 1;
+
+export function readJsonFile(filePath) {
+  let data = fs.readFileSync(filePath);
+  if (filePath.endsWith('.gz')) data = zlib.gunzipSync(data);
+  else if (filePath.endsWith('.br')) data = zlib.brotliDecompressSync(data);
+  return JSON.parse(data.toString('utf-8'));
+}
+
+// Text columns are dictionary-encoded when at most this share of values is distinct
+const DICT_MAX_UNIQUE_RATIO = 0.5;
+
+function encodeColumn(values) {
+  if (!values.some((v) => typeof v === 'string')) return values;
+  const index = new Map();
+  const codes = values.map((v) => {
+    if (v === null || v === undefined) return null;
+    if (!index.has(v)) index.set(v, index.size);
+    return index.get(v);
+  });
+  if (index.size > values.length * DICT_MAX_UNIQUE_RATIO) return values.map((v) => (v === undefined ? null : v));
+  return { dict: [...index.keys()], codes };
+}
+
+// Array of records -> columnar table
+export function encodeTable(records) {
+  const columns = [...new Set(records.flatMap((record) => Object.keys(record)))];
+  const data = Object.fromEntries(columns.map((col) => [col, encodeColumn(records.map((record) => record[col]))]));
+  return { format: FORMAT, version: VERSION, rows: records.length, columns, data };
+}
+
+// { name: records } -> one multi-table columnar payload
+export function encodeTables(tables) {
+  return {
+    format: TABLES_FORMAT,
+    version: VERSION,
+    tables: Object.fromEntries(Object.entries(tables).map(([name, records]) => [name, encodeTable(records)])),
+  };
+}
+
+// Materialize one column as a plain array
+function columnValues(values, rows) {
+  if (Array.isArray(values)) return values;
+  const { dict, codes } = values;
+  const out = new Array(rows);
+  for (let i = 0; i < rows; i++) {
+    const code = codes[i];
+    out[i] = code === null ? null : dict[code];
+  }
+  return out;
+}
+
+// Columnar table -> array of records ({ column: value })
+export function decodeTable(payload) {
+  if (payload.format !== FORMAT || payload.version !== VERSION) {
+    throw new Error(`Not a version ${VERSION} columnar table: ${payload.format} ${payload.version}`);
+  }
+  const { rows, columns } = payload;
+  const arrays = columns.map((col) => columnValues(payload.data[col], rows));
+  const records = new Array(rows);
+  for (let i = 0; i < rows; i++) {
+    const record = {};
+    for (let c = 0; c < columns.length; c++) record[columns[c]] = arrays[c][i];
+    records[i] = record;
+  }
+  return records;
+}
+
+// Any JSON payload -> records: columnar tables are decoded, records JSON passes through
+export function decodePayload(payload) {
+  if (payload && payload.format === TABLES_FORMAT) {
+    return Object.fromEntries(Object.entries(payload.tables).map(([name, table]) => [name, decodeTable(table)]));
+  }
+  if (payload && payload.format === FORMAT) return decodeTable(payload);
+  return payload;
+}
+
+// Most recently written file among `candidates` (the earlier one on a tie), decoded to records, so a
+// stale file in another format is never picked over a newer one
+export function loadJson(candidates) {
+  let found = null;
+  let newest = -Infinity;
+  for (const candidate of candidates) {
+    if (!fs.existsSync(candidate)) continue;
+    const { mtimeMs } = fs.statSync(candidate);
+    if (mtimeMs > newest) {
+      found = candidate;
+      newest = mtimeMs;
+    }
+  }
+  if (!found) throw new Error(`None of these files exist: ${candidates.join(', ')}`);
+  return { path: found, data: decodePayload(readJsonFile(found)) };
+}
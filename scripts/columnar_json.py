@@ -0,0 +1,214 @@
+"""
+Compact, dictionary-encoded JSON for the frontend data files
+
+orient="records" JSON repeats every key on every row and long strings
+(COMPANY_NAME, PROV_NAME, DIAGNOSIS, BENEFIT_DESC, ...) on every record.
+The columnar layout stores one array per column instead, and replaces
+repetitive text columns with a lookup table plus integer codes:
+
+    {
+      "format": "columnar", "version": 1, "rows": 3,
+      "columns": ["CLAIM_ID", "STATUS", "CLAIMED_AMOUNT"],
+      "data": {
+        "CLAIM_ID": ["CLM0000100000", "CLM0000100001", "CLM0000100002"],
+        "STATUS": {"dict": ["Approved", "Rejected"], "codes": [0, 0, 1]},
+        "CLAIMED_AMOUNT": [120, 75.5, null]
+      }
+    }
+
+Missing values are null (in "codes" as well). Dates are ISO strings, as
+with to_json(date_format="iso"). Several tables can share one file as
+{"format": "columnar-tables", "version": 1, "tables": {name: table}}.
+
+Files can also be written precompressed (<name>.json.gz, and .json.br
+when the brotli package is installed) for static hosting. columnar_json.mjs
+decodes the same format in Node (load_data_to_db.mjs).
+
+Usage:
+    # Convert records JSON (a list of records or {table: [records]}) to columnar
+    python scripts/columnar_json.py convert client/public/data/seed_data.json --compress gzip
+"""
+
+import argparse
+import gzip
+import json
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+FORMAT = "columnar"
+TABLES_FORMAT = "columnar-tables"
+VERSION = 1
+COMPRESSIONS = {"gzip": ".gz", "brotli": ".br"}
+JSON_FORMATS = ["records", "columnar", "both"]
+
+# Text columns are dictionary-encoded when at most this share of values is distinct
+DICT_MAX_UNIQUE_RATIO = 0.5
+FLOAT_DECIMALS = 10
+
+
+def _plain_values(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        text = series.dt.strftime("%Y-%m-%dT%H:%M:%S.%f").str[:-3]
+        return text.astype(object).where(series.notna(), None).tolist()
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return series.tolist()
+    if pd.api.types.is_float_dtype(series):
+        # Formatted by to_json itself, so values round exactly as in the records files (rounding float32 in
+        # place adds binary error: 58.0 -> 58.000003814697266)
+        return json.loads(series.astype(np.float64).to_json(orient="values", double_precision=FLOAT_DECIMALS))
+    if series.isna().any():
+        return series.astype(object).where(series.notna(), None).tolist()
+    return series.tolist()
+
+
+def encode_column(series):
+    """Plain value list, or {"dict", "codes"} for repetitive text / categorical columns"""
+    text_like = isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object \
+        or pd.api.types.is_string_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)
+    if not text_like or len(series) == 0:
+        return _plain_values(series)
+
+    codes, uniques = pd.factorize(series, sort=False)
+    if len(uniques) > len(series) * DICT_MAX_UNIQUE_RATIO:
+        return _plain_values(series)
+
+    codes = codes.astype(object)
+    codes[codes == -1] = None
+    return {"dict": _plain_values(pd.Series(uniques)), "codes": codes.tolist()}
+
+
+def encode_table(df):
+    return {
+        "format": FORMAT,
+        "version": VERSION,
+        "rows": len(df),
+        "columns": [str(c) for c in df.columns],
+        "data": {str(col): encode_column(df[col]) for col in df.columns},
+    }
+
+
+def decode_table(payload):
+    """DataFrame from a columnar payload; dictionary columns come back as categoricals"""
+    if payload.get("format") != FORMAT or payload.get("version") != VERSION:
+        raise ValueError(f"Not a version {VERSION} columnar table: {payload.get('format')} {payload.get('version')}")
+
+    columns = {}
+    for col in payload["columns"]:
+        values = payload["data"][col]
+        if isinstance(values, dict):
+            codes = np.array([-1 if c is None else c for c in values["codes"]], dtype=np.int64)
+            columns[col] = pd.Categorical.from_codes(codes, categories=pd.Index(values["dict"]))
+        else:
+            columns[col] = values
+    return pd.DataFrame(columns, columns=payload["columns"])
+
+
+def _write_compressed(data, path, compress=()):
+    """Precompressed copies (<path>.gz / <path>.br) of JSON bytes already written to `path`"""
+    written = []
+    for codec in compress:
+        if codec == "gzip":
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        elif codec == "brotli":
+            if not BROTLI_AVAILABLE:
+                raise RuntimeError("Brotli output requires the brotli package (pip install brotli)")
+            compressed = brotli.compress(data)
+        else:
+            raise ValueError(f"Unknown compression: {codec}")
+        with open(f"{path}{COMPRESSIONS[codec]}", "wb") as f:
+            f.write(compressed)
+        written.append(f"{path}{COMPRESSIONS[codec]}")
+    return written
+
+
+def _dump(payload, path, compress=()):
+    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+    return [path] + _write_compressed(data, path, compress)
+
+
+def write_columnar_json(df, path, compress=()):
+    return _dump(encode_table(df), path, compress)
+
+
+def write_columnar_tables(tables, path, compress=()):
+    """Several tables ({name: DataFrame}) in one columnar file"""
+    payload = {"format": TABLES_FORMAT, "version": VERSION,
+               "tables": {name: encode_table(df) for name, df in tables.items()}}
+    return _dump(payload, path, compress)
+
+
+def write_json(df, output_dir, table, json_format="records", compress=()):
+    """
+    Write <table>.json (records), <table>.columnar.json or both, each with
+    the requested precompressed copies. Returns the paths written.
+    """
+    written = []
+    if json_format in ("records", "both"):
+        path = os.path.join(output_dir, f"{table}.json")
+        df.to_json(path, orient="records", date_format="iso")
+        written.append(path)
+        if compress:
+            with open(path, "rb") as f:
+                written += _write_compressed(f.read(), path, compress)
+    if json_format in ("columnar", "both"):
+        written += write_columnar_json(df, os.path.join(output_dir, f"{table}.columnar.json"), compress)
+    return written
+
+
+def _load(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".gz"):
+        data = gzip.decompress(data)
+    elif path.endswith(".br"):
+        if not BROTLI_AVAILABLE:
+            raise RuntimeError("Reading .br files requires the brotli package (pip install brotli)")
+        data = brotli.decompress(data)
+    return json.loads(data)
+
+
+def read_columnar_json(path):
+    """DataFrame (single table) or {name: DataFrame} (multi-table file)"""
+    payload = _load(path)
+    if payload.get("format") == TABLES_FORMAT:
+        return {name: decode_table(table) for name, table in payload["tables"].items()}
+    return decode_table(payload)
+
+
+def convert(path, output=None, compress=()):
+    """Records JSON (a list of records or {table: [records]}) -> columnar file"""
+    payload = _load(path)
+    base = path[:-len(".json")] if path.endswith(".json") else path
+    output = output or f"{base}.columnar.json"
+
+    if isinstance(payload, dict):
+        return write_columnar_tables({name: pd.DataFrame(rows) for name, rows in payload.items()}, output, compress)
+    return write_columnar_json(pd.DataFrame(payload), output, compress)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar, dictionary-encoded JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert_cmd = sub.add_parser("convert", help="Convert records JSON to columnar JSON")
+    convert_cmd.add_argument("path", help="Records JSON file")
+    convert_cmd.add_argument("--output", help="Output file (default: <name>.columnar.json)")
+    convert_cmd.add_argument("--compress", nargs="*", choices=list(COMPRESSIONS), default=[],
+                             help="Also write precompressed copies")
+    args = parser.parse_args()
+
+    before = os.path.getsize(args.path)
+    for path in convert(args.path, args.output, args.compress):
+        print(f"✓ Saved: {path} ({os.path.getsize(path) / before:.1%} of {before:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
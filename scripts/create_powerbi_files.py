@@ -1,263 +1,85 @@
 #!/usr/bin/env python3
 """
 Create Power BI compatible files with IVI data and analysis
+
+Usage:
+    python scripts/create_powerbi_files.py
+    python scripts/create_powerbi_files.py --data-dir out/data --output-dir out/powerbi \\
+        --providers Provider_Info.xlsx --no-public-copy
+    # Data generated with --providers synthetic: use the provider table written next to it
+    python scripts/create_powerbi_files.py --data-dir out/data --providers synthetic
 """
 
+import argparse
 import pandas as pd
 import json
 from datetime import datetime
 import os
+import shutil
 
-# Output directory
-OUTPUT_DIR = '/home/ubuntu/ivi-dashboard/client/public/powerbi'
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+from data_cache import read_excel_cached, read_table_cached
+from excel_export import write_workbook
+from ivi_prediction import rebase_predictions
+from pipeline_io import parquet_path
+from preauth_analytics import INPUT_COLUMNS as PREAUTH_COLUMNS, SHEETS as PREAUTH_SHEETS, preauth_analytics
+from provider_analytics import INPUT_COLUMNS as CLAIM_COLUMNS, PERCENTILE_COLUMNS, provider_analytics
+from synthetic_providers import SYNTHETIC
+from validate_data import print_summary, validate_tables
 
-# Load the sample data
+# Default locations
+OUTPUT_DIR = '/home/ubuntu/ivi-dashboard/client/public/powerbi'
 DATA_DIR = '/home/ubuntu/ivi-dashboard/client/public/data'
-
-print("Loading data files...")
-
-# Load IVI Scores
-ivi_scores = pd.read_csv(f'{DATA_DIR}/ivi_scores.csv')
-future_predictions = pd.read_csv(f'{DATA_DIR}/future_predictions.csv')
-recommendations = pd.read_csv(f'{DATA_DIR}/recommendations.csv')
-feature_importance = pd.read_csv(f'{DATA_DIR}/feature_importance.csv')
-
-# Load Provider Info
-provider_info = pd.read_excel('/home/ubuntu/upload/Provider_Info(2).xlsx')
-
-print(f"Loaded {len(ivi_scores)} IVI scores")
-print(f"Loaded {len(provider_info)} providers")
-
-# Create comprehensive Power BI data model
-
-# 1. IVI Summary Sheet
-ivi_summary = pd.DataFrame({
-    'Metric': [
-        'Total Companies',
-        'Average IVI Score',
-        'Average H Score (Health)',
-        'Average E Score (Experience)',
-        'Average U Score (Utilization)',
-        'High Risk Companies',
-        'Medium Risk Companies',
-        'Low Risk Companies',
-        'Projected Future IVI',
-        'Expected Improvement'
-    ],
-    'Value': [
-        len(ivi_scores),
-        ivi_scores['IVI_SCORE'].mean(),
-        ivi_scores['H_SCORE'].mean(),
-        ivi_scores['E_SCORE'].mean(),
-        ivi_scores['U_SCORE'].mean(),
-        len(ivi_scores[ivi_scores['RISK_CATEGORY'] == 'High']),
-        len(ivi_scores[ivi_scores['RISK_CATEGORY'] == 'Medium']),
-        len(ivi_scores[ivi_scores['RISK_CATEGORY'] == 'Low']),
-        future_predictions['FUTURE_IVI_SCORE'].mean() if 'FUTURE_IVI_SCORE' in future_predictions.columns else ivi_scores['IVI_SCORE'].mean() + 5,
-        5.0  # Default improvement
-    ],
-    'Description': [
-        'Number of corporate clients evaluated',
-        'Average Intelligent Value Index score (0-100)',
-        'Average Health Outcomes score (0-100)',
-        'Average Experience Quality score (0-100)',
-        'Average Utilization Efficiency score (0-100)',
-        'Companies requiring immediate attention',
-        'Companies requiring monitoring',
-        'Companies performing well',
-        'Predicted average IVI in 12 months',
-        'Expected improvement in IVI points'
-    ]
-})
-
-# 2. Risk Distribution
-risk_distribution = ivi_scores.groupby('RISK_CATEGORY').agg({
-    'CONT_NO': 'count',
-    'IVI_SCORE': 'mean',
-    'H_SCORE': 'mean',
-    'E_SCORE': 'mean',
-    'U_SCORE': 'mean'
-}).reset_index()
-risk_distribution.columns = ['Risk_Category', 'Company_Count', 'Avg_IVI', 'Avg_H', 'Avg_E', 'Avg_U']
-risk_distribution['Percentage'] = (risk_distribution['Company_Count'] / len(ivi_scores) * 100).round(1)
-
-# Standardize column names for consistency
-ivi_scores_renamed = ivi_scores.rename(columns={
-    'IVI_SCORE': 'IVI_Score',
-    'H_SCORE': 'H_score',
-    'E_SCORE': 'E_score',
-    'U_SCORE': 'U_score',
-    'RISK_CATEGORY': 'Risk_Category'
-})
-
-# 3. Provider Analysis
-# Rename columns for consistency
-provider_info = provider_info.rename(columns={
-    'PROV_CODE': 'Prov Code',
-    'PROV_NAME': 'Prov Name',
-    'PROVIDER_NETWORK': 'Provider Network',
-    'PROVIDER_PRACTICE': 'Provider Practice',
-    'PROVIDER_REGION': 'Provider Region',
-    'PROVIDER_TOWN': 'Provider Town'
-})
-
-provider_analysis = provider_info.groupby('Provider Network').agg({
-    'Prov Code': 'count',
-    'Provider Practice': lambda x: x.mode()[0] if len(x) > 0 else 'Unknown'
-}).reset_index()
-provider_analysis.columns = ['Network', 'Provider_Count', 'Most_Common_Practice']
-
-provider_by_region = provider_info.groupby('Provider Region').agg({
-    'Prov Code': 'count'
-}).reset_index()
-provider_by_region.columns = ['Region', 'Provider_Count']
-
-# 4. Feature Importance for Power BI
-feature_importance_pbi = feature_importance.copy()
-feature_importance_pbi['Importance_Percent'] = (feature_importance_pbi['Importance'] * 100).round(2)
-
-# 5. Detailed Client Analysis
-# Check available columns in future_predictions
-fp_cols = [c for c in ['CONT_NO', 'FUTURE_IVI_SCORE', 'IMPROVEMENT', 'Future_IVI_Score', 'Improvement'] if c in future_predictions.columns]
-rec_cols = [c for c in ['CONT_NO', 'RECOMMENDATIONS', 'Recommendations'] if c in recommendations.columns]
-
-if len(fp_cols) >= 2:
-    client_analysis = ivi_scores.merge(future_predictions[fp_cols], on='CONT_NO', how='left')
-else:
-    client_analysis = ivi_scores.copy()
-    client_analysis['FUTURE_IVI_SCORE'] = client_analysis['IVI_SCORE'] + 5
-    client_analysis['IMPROVEMENT'] = 5
-
-if len(rec_cols) >= 2:
-    client_analysis = client_analysis.merge(recommendations[rec_cols], on='CONT_NO', how='left')
-else:
-    client_analysis['RECOMMENDATIONS'] = 'Review and optimize'
-
-# 6. Create DAX Measures Reference
-dax_measures = pd.DataFrame({
-    'Measure_Name': [
-        'Total Companies',
-        'Average IVI',
-        'High Risk Count',
-        'Medium Risk Count',
-        'Low Risk Count',
-        'Health Score Average',
-        'Experience Score Average',
-        'Utilization Score Average',
-        'Projected Improvement',
-        'Risk Percentage'
-    ],
-    'DAX_Formula': [
-        'COUNTROWS(IVI_Scores)',
-        'AVERAGE(IVI_Scores[IVI_Score])',
-        'CALCULATE(COUNTROWS(IVI_Scores), IVI_Scores[Risk_Category] = "High Risk")',
-        'CALCULATE(COUNTROWS(IVI_Scores), IVI_Scores[Risk_Category] = "Medium Risk")',
-        'CALCULATE(COUNTROWS(IVI_Scores), IVI_Scores[Risk_Category] = "Low Risk")',
-        'AVERAGE(IVI_Scores[H_score])',
-        'AVERAGE(IVI_Scores[E_score])',
-        'AVERAGE(IVI_Scores[U_score])',
-        'AVERAGE(Future_Predictions[Improvement])',
-        'DIVIDE([High Risk Count], [Total Companies], 0) * 100'
-    ],
-    'Description': [
-        'Count of all companies in portfolio',
-        'Mean IVI score across all companies',
-        'Number of high risk companies',
-        'Number of medium risk companies',
-        'Number of low risk companies',
-        'Average health outcomes score',
-        'Average experience quality score',
-        'Average utilization efficiency score',
-        'Average expected improvement in IVI',
-        'Percentage of high risk companies'
-    ]
-})
-
-# 7. Create Power BI Data Model Schema
-data_model = {
-    'tables': [
-        {
-            'name': 'IVI_Scores',
-            'columns': list(ivi_scores.columns),
-            'description': 'Main fact table containing IVI scores for each company'
-        },
-        {
-            'name': 'Future_Predictions',
-            'columns': list(future_predictions.columns),
-            'description': 'Predicted future IVI scores and improvements'
-        },
-        {
-            'name': 'Recommendations',
-            'columns': list(recommendations.columns),
-            'description': 'Recommended actions for each company'
-        },
-        {
-            'name': 'Feature_Importance',
-            'columns': list(feature_importance.columns),
-            'description': 'Feature importance for IVI model'
-        },
-        {
-            'name': 'Provider_Info',
-            'columns': list(provider_info.columns),
-            'description': 'Healthcare provider information'
-        }
-    ],
-    'relationships': [
-        {
-            'from_table': 'Future_Predictions',
-            'from_column': 'CONT_NO',
-            'to_table': 'IVI_Scores',
-            'to_column': 'CONT_NO',
-            'cardinality': 'Many-to-One'
-        },
-        {
-            'from_table': 'Recommendations',
-            'from_column': 'CONT_NO',
-            'to_table': 'IVI_Scores',
-            'to_column': 'CONT_NO',
-            'cardinality': 'Many-to-One'
-        }
-    ]
+PROVIDERS_PATH = '/home/ubuntu/upload/Provider_Info(2).xlsx'
+PUBLIC_COPY = '/home/ubuntu/ivi-dashboard/client/public/IVI_PowerBI_Data.xlsx'
+
+# build_powerbi_tables() arguments, in order
+INPUT_TABLES = ['ivi_scores', 'future_predictions', 'recommendations', 'feature_importance', 'provider_info', 'claims',
+                'preauthorizations']
+
+# Model outputs that may not exist yet; missing ones load as empty tables
+# and the export falls back to its defaults
+OPTIONAL_TABLES = {
+    'future_predictions': ['CONT_NO'],
+    'recommendations': ['CONT_NO'],
+    'feature_importance': ['Feature', 'Importance'],
+    'claims': CLAIM_COLUMNS,
+    'preauthorizations': PREAUTH_COLUMNS,
 }
 
-# Save all files
-print("\nSaving Power BI files...")
-
-# Excel workbook with all sheets
-with pd.ExcelWriter(f'{OUTPUT_DIR}/IVI_PowerBI_Data.xlsx', engine='openpyxl') as writer:
-    ivi_summary.to_excel(writer, sheet_name='Summary', index=False)
-    ivi_scores.to_excel(writer, sheet_name='IVI_Scores', index=False)
-    future_predictions.to_excel(writer, sheet_name='Future_Predictions', index=False)
-    recommendations.to_excel(writer, sheet_name='Recommendations', index=False)
-    feature_importance_pbi.to_excel(writer, sheet_name='Feature_Importance', index=False)
-    risk_distribution.to_excel(writer, sheet_name='Risk_Distribution', index=False)
-    client_analysis.to_excel(writer, sheet_name='Client_Analysis', index=False)
-    provider_info.to_excel(writer, sheet_name='Provider_Info', index=False)
-    provider_analysis.to_excel(writer, sheet_name='Provider_Analysis', index=False)
-    provider_by_region.to_excel(writer, sheet_name='Provider_By_Region', index=False)
-    dax_measures.to_excel(writer, sheet_name='DAX_Measures', index=False)
-
-print(f"✓ Saved: {OUTPUT_DIR}/IVI_PowerBI_Data.xlsx")
-
-# Save individual CSV files for direct import
-ivi_scores.to_csv(f'{OUTPUT_DIR}/ivi_scores.csv', index=False)
-future_predictions.to_csv(f'{OUTPUT_DIR}/future_predictions.csv', index=False)
-recommendations.to_csv(f'{OUTPUT_DIR}/recommendations.csv', index=False)
-feature_importance_pbi.to_csv(f'{OUTPUT_DIR}/feature_importance.csv', index=False)
-provider_info.to_csv(f'{OUTPUT_DIR}/provider_info.csv', index=False)
-client_analysis.to_csv(f'{OUTPUT_DIR}/client_analysis.csv', index=False)
-
-print(f"✓ Saved CSV files to {OUTPUT_DIR}/")
+# Tables read with only some of their columns
+INPUT_COLUMNS = {
+    'claims': CLAIM_COLUMNS,
+    'preauthorizations': PREAUTH_COLUMNS,
+}
 
-# Save data model schema as JSON
-with open(f'{OUTPUT_DIR}/data_model.json', 'w') as f:
-    json.dump(data_model, f, indent=2)
+# provider_analytics() column -> Provider_Analysis / Provider_Performance column
+PROVIDER_METRIC_NAMES = {
+    'PROVIDER_NETWORK': 'Network',
+    'PROVIDERS': 'Provider_Count',
+    'MOST_COMMON_PRACTICE': 'Most_Common_Practice',
+    'ACTIVE_PROVIDERS': 'Active_Providers',
+    'CLAIMS': 'Claim_Count',
+    'MEMBERS': 'Member_Count',
+    'TOTAL_CLAIMED': 'Total_Claimed',
+    'TOTAL_APPROVED': 'Total_Approved',
+    'AVG_CLAIMED': 'Avg_Claimed',
+    'REJECTION_RATE': 'Rejection_Rate',
+    'AVG_PROCESSING_DAYS': 'Avg_Processing_Days',
+    **{column: column.title() for column in PERCENTILE_COLUMNS},
+    'SPEND_SHARE': 'Spend_Share',
+}
 
-print(f"✓ Saved: {OUTPUT_DIR}/data_model.json")
+# Sheets also written as individual CSV files
+CSV_EXPORTS = {
+    'IVI_Scores': 'ivi_scores.csv',
+    'Future_Predictions': 'future_predictions.csv',
+    'Recommendations': 'recommendations.csv',
+    'Feature_Importance': 'feature_importance.csv',
+    'Provider_Info': 'provider_info.csv',
+    'Client_Analysis': 'client_analysis.csv',
+}
 
-# Create Power BI Implementation Guide
-guide_content = """# Power BI Implementation Guide for IVI Dashboard
+GUIDE_CONTENT = """# Power BI Implementation Guide for IVI Dashboard
 
 ## Overview
 This guide provides step-by-step instructions for implementing the Intelligent Value Index (IVI) dashboard in Microsoft Power BI.
@@ -269,7 +91,7 @@ The following files are available for import:
 |------|-------------|
 | `IVI_PowerBI_Data.xlsx` | Complete Excel workbook with all data sheets |
 | `ivi_scores.csv` | Main IVI scores for all companies |
-| `future_predictions.csv` | Predicted future IVI scores |
+| `future_predictions.csv` | Predicted future IVI scores (on the IVI_Scores basis) |
 | `recommendations.csv` | Recommended actions per company |
 | `feature_importance.csv` | Feature importance analysis |
 | `provider_info.csv` | Healthcare provider information |
@@ -425,26 +247,392 @@ For questions or issues, contact the IVI Dashboard team.
 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 """
 
-with open(f'{OUTPUT_DIR}/PowerBI_Implementation_Guide.md', 'w') as f:
-    f.write(guide_content)
 
-print(f"✓ Saved: {OUTPUT_DIR}/PowerBI_Implementation_Guide.md")
+def _read_optional(table, data_dir):
+    if not any(os.path.exists(path) for path in (parquet_path(data_dir, table), f'{data_dir}/{table}.csv')):
+        print(f"No {table} table in {data_dir}, using defaults")
+        return pd.DataFrame(columns=OPTIONAL_TABLES[table])
+    return read_table_cached(table, data_dir, columns=INPUT_COLUMNS.get(table))
+
+
+def load_input(name, data_dir=DATA_DIR, providers_path=PROVIDERS_PATH):
+    """One of the load_inputs() tables by name (cached parse)"""
+    if name == 'provider_info':
+        return read_table_cached('providers', data_dir) if providers_path == SYNTHETIC else read_excel_cached(providers_path)
+    if name in OPTIONAL_TABLES:
+        return _read_optional(name, data_dir)
+    return read_table_cached(name, data_dir)
+
+
+def load_inputs(data_dir=DATA_DIR, providers_path=PROVIDERS_PATH):
+    """
+    Load the IVI tables (typed Parquet copy when generate_sample_data.py wrote
+    one, CSV otherwise) and the provider master. Parsed inputs are cached on
+    disk and reused while the source files are unchanged. With
+    providers_path SYNTHETIC the providers table in data_dir is used.
+    """
+    print("Loading data files...")
+    inputs = {name: load_input(name, data_dir, providers_path) for name in INPUT_TABLES}
+    print(f"Loaded {len(inputs['ivi_scores'])} IVI scores")
+    print(f"Loaded {len(inputs['provider_info'])} providers")
+    print(f"Loaded {len(inputs['claims'])} claims")
+    print(f"Loaded {len(inputs['preauthorizations'])} pre-authorizations")
+    return inputs
+
+
+def summary_sheet(ivi_scores, future_predictions):
+    """Portfolio KPIs (Metric, Value, Description)"""
+    future_predictions = rebase_predictions(future_predictions, ivi_scores)
+    if 'HORIZON_MONTHS' in future_predictions.columns and len(future_predictions):
+        horizon = f"{int(future_predictions['HORIZON_MONTHS'].max())} months ahead"
+    else:
+        horizon = 'at the forecast horizon'
+    return pd.DataFrame({
+        'Metric': [
+            'Total Companies',
+            'Average IVI Score',
+            'Average H Score (Health)',
+            'Average E Score (Experience)',
+            'Average U Score (Utilization)',
+            'High Risk Companies',
+            'Medium Risk Companies',
+            'Low Risk Companies',
+            'Projected Future IVI',
+            'Expected Improvement'
+        ],
+        'Value': [
+            len(ivi_scores),
+            ivi_scores['IVI_SCORE'].mean(),
+            ivi_scores['H_SCORE'].mean(),
+            ivi_scores['E_SCORE'].mean(),
+            ivi_scores['U_SCORE'].mean(),
+            len(ivi_scores[ivi_scores['RISK_CATEGORY'] == 'High']),
+            len(ivi_scores[ivi_scores['RISK_CATEGORY'] == 'Medium']),
+            len(ivi_scores[ivi_scores['RISK_CATEGORY'] == 'Low']),
+            future_predictions['FUTURE_IVI_SCORE'].mean() if 'FUTURE_IVI_SCORE' in future_predictions.columns else ivi_scores['IVI_SCORE'].mean() + 5,
+            future_predictions['IMPROVEMENT'].mean() if 'IMPROVEMENT' in future_predictions.columns else 5.0  # Default improvement
+        ],
+        'Description': [
+            'Number of corporate clients evaluated',
+            'Average Intelligent Value Index score (0-100)',
+            'Average Health Outcomes score (0-100)',
+            'Average Experience Quality score (0-100)',
+            'Average Utilization Efficiency score (0-100)',
+            'Companies requiring immediate attention',
+            'Companies requiring monitoring',
+            'Companies performing well',
+            f'Predicted average IVI {horizon}',
+            'Expected improvement in IVI points'
+        ]
+    })
+
+
+def future_predictions_sheet(ivi_scores, future_predictions):
+    """Predictions on the IVI_Scores basis (rebase_predictions), like the Summary and Client_Analysis figures"""
+    return rebase_predictions(future_predictions, ivi_scores)
+
+
+def risk_distribution_sheet(ivi_scores):
+    risk_distribution = ivi_scores.groupby('RISK_CATEGORY', observed=True).agg({
+        'CONT_NO': 'count',
+        'IVI_SCORE': 'mean',
+        'H_SCORE': 'mean',
+        'E_SCORE': 'mean',
+        'U_SCORE': 'mean'
+    }).reset_index()
+    risk_distribution.columns = ['Risk_Category', 'Company_Count', 'Avg_IVI', 'Avg_H', 'Avg_E', 'Avg_U']
+    risk_distribution['Percentage'] = (risk_distribution['Company_Count'] / len(ivi_scores) * 100).round(1)
+    return risk_distribution
+
+
+def provider_info_sheet(provider_info):
+    """Provider master with display column names"""
+    return provider_info.rename(columns={
+        'PROV_CODE': 'Prov Code',
+        'PROV_NAME': 'Prov Name',
+        'PROVIDER_NETWORK': 'Provider Network',
+        'PROVIDER_PRACTICE': 'Provider Practice',
+        'PROVIDER_REGION': 'Provider Region',
+        'PROVIDER_TOWN': 'Provider Town'
+    })
+
+
+def provider_analysis_sheets(provider_info, claims):
+    """
+    (Provider_Analysis, Provider_By_Region, Provider_Performance) from the
+    provider master and the claims (see provider_analytics.py): per-network
+    and per-provider claim volume, spend, rejection rate, processing days
+    and cost percentiles.
+    """
+    by_provider, by_network = provider_analytics(claims, provider_info)
+    provider_analysis = by_network.rename(columns=PROVIDER_METRIC_NAMES)
+
+    provider_by_region = provider_info.groupby('PROVIDER_REGION').agg({
+        'PROV_CODE': 'count'
+    }).reset_index()
+    provider_by_region.columns = ['Region', 'Provider_Count']
+
+    provider_performance = (provider_info_sheet(by_provider).rename(columns=PROVIDER_METRIC_NAMES)
+                            .sort_values('Total_Claimed', ascending=False, kind='stable').reset_index(drop=True))
+    return provider_analysis, provider_by_region, provider_performance
+
+
+def preauth_sheets(preauthorizations):
+    """The PREAUTH_SHEETS (turnaround, documents, missing-document approval, medications, backlog) in order"""
+    sheets = preauth_analytics(preauthorizations)
+    return tuple(sheets[name] for name in PREAUTH_SHEETS)
+
+
+def feature_importance_sheet(feature_importance):
+    feature_importance_pbi = feature_importance.copy()
+    feature_importance_pbi['Importance_Percent'] = (feature_importance_pbi['Importance'] * 100).round(2)
+    return feature_importance_pbi
+
+
+def client_analysis_sheet(ivi_scores, future_predictions, recommendations):
+    """IVI scores joined with the predictions and recommendations (defaults when those are missing)"""
+    future_predictions = rebase_predictions(future_predictions, ivi_scores)
+    # Check available columns in future_predictions
+    fp_cols = [c for c in ['CONT_NO', 'FUTURE_IVI_SCORE', 'IMPROVEMENT', 'Future_IVI_Score', 'Improvement'] if c in future_predictions.columns]
+    rec_cols = [c for c in ['CONT_NO', 'RECOMMENDATIONS', 'Recommendations'] if c in recommendations.columns]
+
+    if len(fp_cols) >= 2:
+        client_analysis = ivi_scores.merge(future_predictions[fp_cols], on='CONT_NO', how='left')
+    else:
+        client_analysis = ivi_scores.copy()
+        client_analysis['FUTURE_IVI_SCORE'] = client_analysis['IVI_SCORE'] + 5
+        client_analysis['IMPROVEMENT'] = 5
+
+    if len(rec_cols) >= 2:
+        client_analysis = client_analysis.merge(recommendations[rec_cols], on='CONT_NO', how='left')
+    else:
+        client_analysis['RECOMMENDATIONS'] = 'Review and optimize'
+    return client_analysis
+
+
+def dax_measures_sheet():
+    """DAX measures reference"""
+    return pd.DataFrame({
+        'Measure_Name': [
+            'Total Companies',
+            'Average IVI',
+            'High Risk Count',
+            'Medium Risk Count',
+            'Low Risk Count',
+            'Health Score Average',
+            'Experience Score Average',
+            'Utilization Score Average',
+            'Projected Improvement',
+            'Risk Percentage'
+        ],
+        'DAX_Formula': [
+            'COUNTROWS(IVI_Scores)',
+            'AVERAGE(IVI_Scores[IVI_Score])',
+            'CALCULATE(COUNTROWS(IVI_Scores), IVI_Scores[Risk_Category] = "High Risk")',
+            'CALCULATE(COUNTROWS(IVI_Scores), IVI_Scores[Risk_Category] = "Medium Risk")',
+            'CALCULATE(COUNTROWS(IVI_Scores), IVI_Scores[Risk_Category] = "Low Risk")',
+            'AVERAGE(IVI_Scores[H_score])',
+            'AVERAGE(IVI_Scores[E_score])',
+            'AVERAGE(IVI_Scores[U_score])',
+            'AVERAGE(Future_Predictions[Improvement])',
+            'DIVIDE([High Risk Count], [Total Companies], 0) * 100'
+        ],
+        'Description': [
+            'Count of all companies in portfolio',
+            'Mean IVI score across all companies',
+            'Number of high risk companies',
+            'Number of medium risk companies',
+            'Number of low risk companies',
+            'Average health outcomes score',
+            'Average experience quality score',
+            'Average utilization efficiency score',
+            'Average expected improvement in IVI',
+            'Percentage of high risk companies'
+        ]
+    })
+
+
+def data_model_schema(ivi_scores, future_predictions, recommendations, feature_importance, provider_info):
+    """Power BI data model (tables with their columns, relationships) for data_model.json"""
+    return {
+        'tables': [
+            {
+                'name': 'IVI_Scores',
+                'columns': list(ivi_scores.columns),
+                'description': 'Main fact table containing IVI scores for each company'
+            },
+            {
+                'name': 'Future_Predictions',
+                'columns': list(future_predictions.columns),
+                'description': 'Predicted future IVI scores and improvements'
+            },
+            {
+                'name': 'Recommendations',
+                'columns': list(recommendations.columns),
+                'description': 'Recommended actions for each company'
+            },
+            {
+                'name': 'Feature_Importance',
+                'columns': list(feature_importance.columns),
+                'description': 'Feature importance for IVI model'
+            },
+            {
+                'name': 'Provider_Info',
+                'columns': list(provider_info.columns),
+                'description': 'Healthcare provider information'
+            }
+        ],
+        'relationships': [
+            {
+                'from_table': 'Future_Predictions',
+                'from_column': 'CONT_NO',
+                'to_table': 'IVI_Scores',
+                'to_column': 'CONT_NO',
+                'cardinality': 'Many-to-One'
+            },
+            {
+                'from_table': 'Recommendations',
+                'from_column': 'CONT_NO',
+                'to_table': 'IVI_Scores',
+                'to_column': 'CONT_NO',
+                'cardinality': 'Many-to-One'
+            }
+        ]
+    }
+
+
+def build_powerbi_tables(ivi_scores, future_predictions, recommendations, feature_importance, provider_info,
+                         claims=None, preauthorizations=None):
+    """
+    Build the Power BI data model from the loaded inputs.
+    Returns ({sheet name: DataFrame} in workbook order, data model schema dict).
+    """
+    if claims is None:
+        claims = pd.DataFrame(columns=CLAIM_COLUMNS)
+    if preauthorizations is None:
+        preauthorizations = pd.DataFrame(columns=PREAUTH_COLUMNS)
+    provider_analysis, provider_by_region, provider_performance = provider_analysis_sheets(provider_info, claims)
+    provider_info = provider_info_sheet(provider_info)
+    # One prediction basis for every sheet (the sheet builders' own rebase leaves it unchanged)
+    future_predictions = future_predictions_sheet(ivi_scores, future_predictions)
+
+    sheets = {
+        'Summary': summary_sheet(ivi_scores, future_predictions),
+        'IVI_Scores': ivi_scores,
+        'Future_Predictions': future_predictions,
+        'Recommendations': recommendations,
+        'Feature_Importance': feature_importance_sheet(feature_importance),
+        'Risk_Distribution': risk_distribution_sheet(ivi_scores),
+        'Client_Analysis': client_analysis_sheet(ivi_scores, future_predictions, recommendations),
+        'Provider_Info': provider_info,
+        'Provider_Analysis': provider_analysis,
+        'Provider_By_Region': provider_by_region,
+        'Provider_Performance': provider_performance,
+        **dict(zip(PREAUTH_SHEETS, preauth_sheets(preauthorizations))),
+        'DAX_Measures': dax_measures_sheet(),
+    }
+    data_model = data_model_schema(ivi_scores, future_predictions, recommendations, feature_importance, provider_info)
+    return sheets, data_model
+
+
+def write_csv_exports(sheets, output_dir=OUTPUT_DIR):
+    """Individual CSV files of the CSV_EXPORTS sheets present in `sheets`, for direct import"""
+    for sheet, filename in CSV_EXPORTS.items():
+        if sheet in sheets:
+            sheets[sheet].to_csv(f'{output_dir}/{filename}', index=False)
+
+
+def write_data_model(data_model, output_dir=OUTPUT_DIR):
+    with open(f'{output_dir}/data_model.json', 'w') as f:
+        json.dump(data_model, f, indent=2)
+
+
+def write_guide(output_dir=OUTPUT_DIR):
+    with open(f'{output_dir}/PowerBI_Implementation_Guide.md', 'w') as f:
+        f.write(GUIDE_CONTENT)
+
+
+def write_powerbi_files(sheets, data_model, output_dir=OUTPUT_DIR, public_copy=PUBLIC_COPY):
+    """Write the workbook, per-table CSVs, data model and implementation guide"""
+    os.makedirs(output_dir, exist_ok=True)
+    print("\nSaving Power BI files...")
+
+    # Excel workbook with all sheets
+    write_workbook(f'{output_dir}/IVI_PowerBI_Data.xlsx', sheets)
+
+    print(f"✓ Saved: {output_dir}/IVI_PowerBI_Data.xlsx")
+
+    write_csv_exports(sheets, output_dir)
+
+    print(f"✓ Saved CSV files to {output_dir}/")
+
+    write_data_model(data_model, output_dir)
+
+    print(f"✓ Saved: {output_dir}/data_model.json")
+
+    # Create Power BI Implementation Guide
+    write_guide(output_dir)
+
+    print(f"✓ Saved: {output_dir}/PowerBI_Implementation_Guide.md")
+
+    # Copy to main public folder as well
+    if public_copy:
+        shutil.copy(f'{output_dir}/IVI_PowerBI_Data.xlsx', public_copy)
+
+    print("\n" + "="*50)
+    print("Power BI files created successfully!")
+    print("="*50)
+    print(f"\nFiles location: {output_dir}/")
+    print("\nFiles created:")
+    print("  - IVI_PowerBI_Data.xlsx (Complete workbook)")
+    for filename in CSV_EXPORTS.values():
+        print(f"  - {filename}")
+    print("  - data_model.json")
+    print("  - PowerBI_Implementation_Guide.md")
+
+
+def validate_inputs(inputs, strict=False):
+    """
+    Check the keys the export merges on (model outputs -> ivi_scores, unique
+    CONT_NO / PROV_CODE) and the score ranges before building the sheets.
+    Violations are printed, or raised with strict.
+    """
+    summary, _ = validate_tables({
+        'ivi_scores': inputs['ivi_scores'],
+        'future_predictions': inputs['future_predictions'],
+        'recommendations': inputs['recommendations'],
+        'providers': inputs['provider_info'],
+    })
+    failed = summary[summary['VIOLATIONS'] > 0]
+    if len(failed):
+        print_summary(summary)
+        if strict:
+            raise ValueError(f"{len(failed)} validation rule(s) failed for the Power BI inputs")
+
+
+def create_powerbi_files(data_dir=DATA_DIR, output_dir=OUTPUT_DIR, providers_path=PROVIDERS_PATH, public_copy=PUBLIC_COPY,
+                         strict=False):
+    inputs = load_inputs(data_dir, providers_path)
+    validate_inputs(inputs, strict=strict)
+    sheets, data_model = build_powerbi_tables(**inputs)
+    write_powerbi_files(sheets, data_model, output_dir, public_copy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create Power BI files from the IVI data")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with ivi_scores and model outputs")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Directory for the Power BI files")
+    parser.add_argument("--providers", default=PROVIDERS_PATH,
+                        help=f"Provider master Excel file, or '{SYNTHETIC}' for the providers table in --data-dir")
+    parser.add_argument("--public-copy", default=PUBLIC_COPY, help="Extra copy of the workbook for the web app")
+    parser.add_argument("--no-public-copy", dest="public_copy", action="store_const", const=None,
+                        help="Don't copy the workbook to the web app")
+    parser.add_argument("--strict", action="store_true",
+                        help="Stop when the inputs fail validation (orphan or duplicate keys, scores out of range)")
+    args = parser.parse_args()
 
-# Copy to main public folder as well
-import shutil
-shutil.copy(f'{OUTPUT_DIR}/IVI_PowerBI_Data.xlsx', '/home/ubuntu/ivi-dashboard/client/public/IVI_PowerBI_Data.xlsx')
-
-print("\n" + "="*50)
-print("Power BI files created successfully!")
-print("="*50)
-print(f"\nFiles location: {OUTPUT_DIR}/")
-print("\nFiles created:")
-print("  - IVI_PowerBI_Data.xlsx (Complete workbook)")
-print("  - ivi_scores.csv")
-print("  - future_predictions.csv")
-print("  - recommendations.csv")
-print("  - feature_importance.csv")
-print("  - provider_info.csv")
-print("  - client_analysis.csv")
-print("  - data_model.json")
-print("  - PowerBI_Implementation_Guide.md")
+    create_powerbi_files(args.data_dir, args.output_dir, args.providers, args.public_copy, strict=args.strict)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+On-disk cache for slow-to-parse pipeline inputs
+
+Parsing the provider master (Provider_Info(2).xlsx) with openpyxl is the
+slowest step of both scripts even though the file rarely changes. The cache
+keeps a pickled snapshot of each parsed input keyed by the SHA-256 of the
+source file contents. File contents are only re-hashed when the file's size
+or mtime changes, so an unchanged input costs one stat() and one unpickle.
+
+The cache lives in $IVI_CACHE_DIR (default ~/.cache/ivi-dashboard);
+set IVI_NO_CACHE=1 to bypass it.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import pandas as pd
+
+from pipeline_io import PARQUET_AVAILABLE, parquet_path, read_table
+
+CACHE_DIR = os.environ.get("IVI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ivi-dashboard"))
+INDEX_FILE = "index.json"
+
+
+def cache_enabled():
+    return os.environ.get("IVI_NO_CACHE", "") in ("", "0")
+
+
+def _files(path):
+    """The file itself, or every file of a dataset directory in a stable order"""
+    if not os.path.isdir(path):
+        return [path]
+    found = []
+    for root, _, names in os.walk(path):
+        found.extend(os.path.join(root, name) for name in names)
+    return sorted(found)
+
+
+def _load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(cache_dir, index):
+    tmp_path = os.path.join(cache_dir, f"{INDEX_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(cache_dir, INDEX_FILE))
+
+
+def content_hash(path, cache_dir=CACHE_DIR):
+    """
+    SHA-256 over the contents of a file (or all files of a directory),
+    reusing the stored hash of files whose size and mtime are unchanged.
+    """
+    index = _load_index(cache_dir)
+    combined = hashlib.sha256()
+    changed = False
+
+    for file_path in _files(path):
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        entry = index.get(key)
+
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            digest = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+            index[key] = entry
+            changed = True
+
+        combined.update(os.path.relpath(file_path, path).encode() if os.path.isdir(path) else b"")
+        combined.update(entry["sha256"].encode())
+
+    if changed:
+        os.makedirs(cache_dir, exist_ok=True)
+        _save_index(cache_dir, index)
+    return combined.hexdigest()
+
+
+def cached_load(source_path, loader, name, cache_dir=CACHE_DIR):
+    """
+    Return loader() for source_path, served from the cache while the source
+    contents are unchanged. `name` distinguishes different parses of the
+    same file (e.g. different sheets or columns).
+    """
+    if not cache_enabled():
+        return loader()
+
+    digest = content_hash(source_path, cache_dir)
+    snapshot = os.path.join(cache_dir, f"{name}-{digest[:16]}.pkl")
+
+    if os.path.exists(snapshot):
+        return pd.read_pickle(snapshot)
+
+    df = loader()
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Drop snapshots of older versions of the same input
+    for stale in glob.glob(os.path.join(cache_dir, f"{name}-*.pkl")):
+        os.remove(stale)
+
+    df.to_pickle(f"{snapshot}.tmp")
+    os.replace(f"{snapshot}.tmp", snapshot)
+    return df
+
+
+def read_excel_cached(path, **kwargs):
+    """pd.read_excel through the cache"""
+    name = "excel-" + hashlib.sha256(f"{os.path.abspath(path)}{sorted(kwargs.items())}".encode()).hexdigest()[:12]
+    return cached_load(path, lambda: pd.read_excel(path, **kwargs), name)
+
+
+def read_table_cached(table, data_dir, columns=None):
+    """pipeline_io.read_table through the cache (keyed by the file actually read)"""
+    source = parquet_path(data_dir, table)
+    if not (PARQUET_AVAILABLE and os.path.exists(source)):
+        source = os.path.join(data_dir, f"{table}.csv")
+    name = "table-" + hashlib.sha256(f"{os.path.abspath(source)}{columns}".encode()).hexdigest()[:12]
+    return cached_load(source, lambda: read_table(table, data_dir, columns=columns), name)
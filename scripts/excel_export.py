@@ -0,0 +1,99 @@
+"""
+Fast Excel export for the Power BI workbooks
+
+Writes IVI_PowerBI_Data.xlsx row by row with a constant-memory streaming
+writer instead of pandas' ExcelWriter: xlsxwriter in constant_memory mode
+when it is installed (pip install xlsxwriter), otherwise openpyxl's
+write-only workbook. Sheets longer than Excel's 1,048,576-row limit are
+split into Claims_1, Claims_2, ... and the time spent on every sheet is
+reported.
+"""
+
+import time
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+EXCEL_MAX_ROWS = 1048576  # Including the header row
+SHEET_NAME_LIMIT = 31
+WRITE_CHUNK_ROWS = 50000
+
+
+def split_sheet(name, df, max_rows=EXCEL_MAX_ROWS - 1):
+    """Split one frame into (sheet name, part) pieces that fit in a sheet"""
+    if len(df) <= max_rows:
+        return [(name, df)]
+
+    parts = []
+    for i, start in enumerate(range(0, len(df), max_rows), start=1):
+        suffix = f"_{i}"
+        parts.append((f"{name[:SHEET_NAME_LIMIT - len(suffix)]}{suffix}", df.iloc[start:start + max_rows]))
+    return parts
+
+
+def _rows(df):
+    """Yield plain Python rows (None for missing values) a chunk at a time"""
+    for start in range(0, len(df), WRITE_CHUNK_ROWS):
+        chunk = df.iloc[start:start + WRITE_CHUNK_ROWS].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+class _XlsxWriterBook:
+    def __init__(self, path):
+        self.book = xlsxwriter.Workbook(path, {"constant_memory": True, "default_date_format": "yyyy-mm-dd"})
+
+    def write_sheet(self, name, df):
+        sheet = self.book.add_worksheet(name)
+        sheet.write_row(0, 0, [str(c) for c in df.columns])
+        for r, row in enumerate(_rows(df), start=1):
+            sheet.write_row(r, 0, row)
+
+    def close(self):
+        self.book.close()
+
+
+class _OpenpyxlBook:
+    def __init__(self, path):
+        from openpyxl import Workbook
+        self.path = path
+        self.book = Workbook(write_only=True)
+
+    def write_sheet(self, name, df):
+        sheet = self.book.create_sheet(name)
+        sheet.append([str(c) for c in df.columns])
+        for row in _rows(df):
+            sheet.append(row)
+
+    def close(self):
+        self.book.save(self.path)
+
+
+def write_workbook(path, sheets, skip_sheets=(), max_rows=EXCEL_MAX_ROWS - 1, verbose=True):
+    """
+    Write `sheets` ({sheet name: DataFrame}, in order) to an .xlsx file.
+
+    Sheets named in skip_sheets are left out; oversized sheets are split.
+    Returns {sheet name: seconds} for the sheets written.
+    """
+    book = _XlsxWriterBook(path) if xlsxwriter is not None else _OpenpyxlBook(path)
+    timings = {}
+
+    for name, df in sheets.items():
+        if name in skip_sheets:
+            continue
+        for part_name, part in split_sheet(name, df, max_rows=max_rows):
+            start = time.perf_counter()
+            book.write_sheet(part_name, part)
+            timings[part_name] = time.perf_counter() - start
+            if verbose:
+                print(f"  {part_name}: {len(part):,} rows in {timings[part_name]:.2f}s")
+
+    start = time.perf_counter()
+    book.close()
+    timings["(save)"] = time.perf_counter() - start
+    if verbose:
+        print(f"  (save): {timings['(save)']:.2f}s")
+    return timings
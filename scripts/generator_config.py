@@ -0,0 +1,106 @@
+"""
+Config files and size profiles for generate_sample_data.py
+
+A config file (JSON, or YAML when PyYAML is installed) can set a size
+profile, any command-line option and the generator's reference data:
+
+    {
+      "profile": "staging",
+      "options": {"providers": "data/Provider_Info.xlsx", "output_dir": "/tmp/ivi-staging", "seed": 7},
+      "reference_data": {
+        "company_names": ["Acme Health", "Globex"],
+        "claim_status_weights": [0.7, 0.15, 0.05, 0.1]
+      }
+    }
+
+Options use the argparse names (output_dir or output-dir); relative paths
+are taken relative to the config file. Values are layered as: built-in
+defaults < size profile (--size-profile, else the config's "profile") <
+config "options" < flags given on the command line. reference_data replaces the matching module-level
+lists in generate_sample_data.py (see REFERENCE_DATA there).
+scripts/config/generator.example.json lists every key.
+"""
+
+import json
+import os
+
+from synthetic_providers import SYNTHETIC
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+CONFIG_SECTIONS = ["profile", "options", "reference_data"]
+
+# Options holding file paths; relative values are taken relative to the config file
+PATH_OPTIONS = ["providers", "output_dir", "report"]
+
+# Option defaults per size profile
+PROFILES = {
+    "demo": {
+        # No "companies": one contract per company name (25 by default, or the config's company_names)
+        "scale": 1.0,
+        "members": None,
+        "workers": 1,
+        "excel": "full",
+    },
+    "staging": {
+        "companies": 100,
+        "members": 100000,
+        "workers": 0,
+        "excel": "summary",
+        "parquet": True,
+        "json_format": "columnar",
+    },
+    "production": {
+        "companies": 300,
+        "members": 1000000,
+        "workers": 0,
+        "stream": True,
+        "chunk_size": 50000,
+        "excel": "none",
+        "parquet": True,
+        "json_format": "columnar",
+        "compress": ["gzip"],
+    },
+}
+
+
+def load_config(path):
+    """Parsed config file with its sections checked; option names normalized to argparse dests"""
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            if not YAML_AVAILABLE:
+                raise RuntimeError("YAML config files require PyYAML (pip install pyyaml); use JSON instead")
+            config = yaml.safe_load(f) or {}
+        else:
+            config = json.load(f)
+
+    unknown = [key for key in config if key not in CONFIG_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown config sections in {path}: {', '.join(unknown)} "
+                         f"(expected {', '.join(CONFIG_SECTIONS)})")
+    if config.get("profile") is not None and config["profile"] not in PROFILES:
+        raise ValueError(f"Unknown profile in {path}: {config['profile']} (expected {', '.join(PROFILES)})")
+
+    options = {key.replace("-", "_"): value for key, value in (config.get("options") or {}).items()}
+    for key in PATH_OPTIONS:
+        if options.get(key) not in (None, SYNTHETIC) and not os.path.isabs(options[key]):
+            options[key] = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(path)), options[key]))
+    config["options"] = options
+    config["reference_data"] = config.get("reference_data") or {}
+    return config
+
+
+def option_defaults(config=None, profile=None):
+    """
+    Option values from the profile (the `profile` argument wins over the
+    config's) overlaid with the config's options.
+    """
+    config = config or {}
+    profile = profile or config.get("profile")
+    defaults = dict(PROFILES[profile]) if profile else {}
+    defaults.update(config.get("options", {}))
+    return defaults
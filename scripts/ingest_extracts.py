@@ -0,0 +1,442 @@
+"""
+Ingestion of real source-system extracts
+
+Reads CSV / Excel extracts of the contract, enrollment, claims, pre-auth
+and call-centre / NPS systems (see DATA_INTEGRATION_GUIDE.md) in chunks,
+maps their columns onto the generator's schema (CONT_NO, MBR_NO,
+CLAIM_DATE, CLAIMED_AMOUNT, ...) and writes the same tables
+generate_sample_data.py does, so every downstream script runs on real
+data unchanged.
+
+Source headers are matched case-insensitively against the target column
+names and COLUMN_ALIASES (CONTRACT_NUMBER -> CONT_NO, SERVICE_DATE ->
+CLAIM_DATE, CLAIM_AMOUNT -> CLAIMED_AMOUNT, ...); a JSON mapping file can
+name the source column for any target column explicitly. Each chunk is
+normalized column-wise (dates via pd.to_datetime, amounts via
+pd.to_numeric after stripping separators, status and call-type labels via
+a lookup over their distinct values), reduced to the additive IVI
+aggregates and appended to the output, so memory is bounded by the chunk
+size rather than the extract size. Rows without a contract number or a
+parseable date are dropped and counted.
+
+Usage:
+    python scripts/ingest_extracts.py --output-dir data --contracts CONTRACTS.csv --members MEMBERS.csv \\
+        --claims CLAIMS.csv --preauths PREAUTH.xlsx --calls NPS.csv
+    python scripts/ingest_extracts.py --output-dir data --contracts c.csv --members m.csv --claims cl.csv \\
+        --mapping mapping.json --date-format claims=%d/%m/%Y --parquet
+"""
+
+import argparse
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+
+from ivi_incremental import STATE_FILE, save_state, state_from_aggregates
+from ivi_periods import monthly_aggregates, period_scores
+from ivi_scoring import combine_aggregates, contract_aggregates, scores_from_aggregates
+from pipeline_io import PARTITION_MODES, TABLE_SCHEMAS, ChunkedTableWriter, apply_dtypes, write_parquet
+from run_report import RunReport
+
+CHUNK_SIZE = 100000
+
+# Output table -> columns taken from the extract (generator schema order)
+TARGET_COLUMNS = {
+    "corporate_clients": ["CONT_NO", "COMPANY_NAME", "SECTOR", "REGION", "NETWORK", "EMPLOYEE_COUNT",
+                          "CONTRACT_START", "CONTRACT_END", "PREMIUM_AMOUNT"],
+    "members": ["MBR_NO", "CONT_NO", "COMPANY_NAME", "GENDER", "AGE", "MARITAL_STATUS", "NATIONALITY", "CITY",
+                "PLAN_NETWORK", "HAS_CHRONIC", "CHRONIC_CONDITIONS", "ENROLLMENT_DATE", "STATUS"],
+    "claims": ["CLAIM_ID", "MBR_NO", "CONT_NO", "COMPANY_NAME", "PROV_CODE", "PROV_NAME", "PROVIDER_PRACTICE",
+               "PROVIDER_REGION", "CLAIM_DATE", "ICD_CODE", "DIAGNOSIS", "BENEFIT_CODE", "BENEFIT_DESC",
+               "CLAIMED_AMOUNT", "APPROVED_AMOUNT", "STATUS", "REJECTION_REASON", "PROCESSING_DAYS"],
+    "preauthorizations": ["PREAUTH_ID", "MBR_NO", "CONT_NO", "COMPANY_NAME", "PROV_CODE", "PROV_NAME",
+                          "MEDICATION_NAME", "MEDICATION_CATEGORY", "ESTIMATED_COST", "REQUEST_DATE",
+                          "DOCS_SUBMITTED", "DOCS_COMPLETE", "STATUS", "DECISION_DATE", "REJECTION_REASON"],
+    "calls": ["CALL_ID", "MBR_NO", "CONT_NO", "COMPANY_NAME", "CALL_CAT", "CALL_TYPE", "CALL_REASON", "CRT_DATE",
+              "UPD_DATE", "STATUS", "RESOLUTION_TIME_HOURS", "SATISFACTION_SCORE"],
+}
+
+# Columns the scoring needs; the rest are carried over when the extract has them
+REQUIRED_COLUMNS = {
+    "corporate_clients": ["CONT_NO", "PREMIUM_AMOUNT"],
+    "members": ["MBR_NO", "CONT_NO", "ENROLLMENT_DATE"],
+    "claims": ["CONT_NO", "CLAIM_DATE", "CLAIMED_AMOUNT", "APPROVED_AMOUNT", "STATUS"],
+    "preauthorizations": ["CONT_NO", "REQUEST_DATE", "STATUS"],
+    "calls": ["CONT_NO", "CRT_DATE", "CALL_TYPE"],
+}
+
+# Values for optional columns the scoring reads
+COLUMN_DEFAULTS = {
+    "corporate_clients": {"SECTOR": "Unknown", "REGION": "Unknown"},
+    "members": {"HAS_CHRONIC": False},
+    "calls": {"SATISFACTION_SCORE": np.nan},
+}
+
+# Source-system header names per target column (compared after normalize_header)
+COLUMN_ALIASES = {
+    "CONT_NO": ["CONTRACT_NUMBER", "CONTRACT_NO", "POLICY_NO", "POLICY_NUMBER"],
+    "MBR_NO": ["MEMBER_ID", "MEMBER_NO", "MEMBER_NUMBER", "MEMBERSHIP_NO"],
+    "COMPANY_NAME": ["CUSTOMER_NAME", "CLIENT_NAME", "CORPORATE_NAME"],
+    "EMPLOYEE_COUNT": ["MEMBER_COUNT", "LIVES"],
+    "CONTRACT_START": ["START_DATE", "CONTRACT_START_DATE", "POLICY_START_DATE", "INCEPTION_DATE"],
+    "CONTRACT_END": ["END_DATE", "CONTRACT_END_DATE", "POLICY_END_DATE", "EXPIRY_DATE"],
+    "PREMIUM_AMOUNT": ["ANNUAL_PREMIUM", "PREMIUM", "GROSS_PREMIUM"],
+    "HAS_CHRONIC": ["HAS_CHRONIC_DISEASE", "IS_CHRONIC", "CHRONIC_FLAG"],
+    "CHRONIC_CONDITIONS": ["CHRONIC_DISEASE_TYPES"],
+    "ENROLLMENT_DATE": ["ENROLLMENT_DT", "EFFECTIVE_DATE", "JOIN_DATE"],
+    "PLAN_NETWORK": ["NETWORK", "PLAN_TYPE"],
+    "STATUS": ["CLAIM_STATUS", "PREAUTH_STATUS", "MEMBER_STATUS", "CALL_STATUS", "DECISION"],
+    "CLAIM_ID": ["CLAIM_NO", "CLAIM_NUMBER"],
+    "CLAIM_DATE": ["SERVICE_DATE", "DATE_OF_SERVICE", "INCURRED_DATE"],
+    "CLAIMED_AMOUNT": ["CLAIM_AMOUNT", "BILLED_AMOUNT", "GROSS_AMOUNT"],
+    "APPROVED_AMOUNT": ["PAID_AMOUNT", "NET_AMOUNT"],
+    "PROV_CODE": ["PROVIDER_ID", "PROVIDER_CODE", "PROVIDER_NO"],
+    "PROV_NAME": ["PROVIDER_NAME"],
+    "ICD_CODE": ["DIAGNOSIS_CODE", "ICD10_CODE", "ICD"],
+    "BENEFIT_CODE": ["CLAIM_TYPE", "SERVICE_TYPE"],
+    "PROCESSING_DAYS": ["TURNAROUND_DAYS"],
+    "PREAUTH_ID": ["PREAUTH_NO", "PRE_AUTH_ID", "APPROVAL_NO"],
+    "ESTIMATED_COST": ["REQUESTED_AMOUNT", "ESTIMATED_AMOUNT"],
+    "MEDICATION_CATEGORY": ["SERVICE_CATEGORY"],
+    "CALL_ID": ["TICKET_ID", "CASE_ID", "INTERACTION_ID"],
+    "CALL_TYPE": ["CASE_TYPE", "INTERACTION_TYPE"],
+    "CRT_DATE": ["CALL_DATE", "CREATED_DATE", "CREATION_DATE", "SURVEY_DATE"],
+    "UPD_DATE": ["UPDATED_DATE", "CLOSED_DATE"],
+    "SATISFACTION_SCORE": ["CSAT", "SATISFACTION", "CSAT_SCORE"],
+}
+
+# Identifier columns are always read as text
+ID_COLUMNS = {"CONT_NO", "MBR_NO", "CLAIM_ID", "PREAUTH_ID", "CALL_ID"}
+
+NUMERIC_COLUMNS = {"EMPLOYEE_COUNT", "PREMIUM_AMOUNT", "AGE", "CLAIMED_AMOUNT", "APPROVED_AMOUNT",
+                   "PROCESSING_DAYS", "ESTIMATED_COST", "RESOLUTION_TIME_HOURS", "SATISFACTION_SCORE"}
+
+BOOLEAN_COLUMNS = {"HAS_CHRONIC", "DOCS_COMPLETE"}
+TRUE_VALUES = {"true", "1", "y", "yes", "t"}
+
+# Source labels (lower case) -> generator labels, per (table, column); unknown labels are kept as they are
+VALUE_MAPS = {
+    ("claims", "STATUS"): {
+        "approved": "Approved", "paid": "Approved", "accepted": "Approved",
+        "rejected": "Rejected", "denied": "Rejected", "declined": "Rejected",
+        "pending": "Pending", "in process": "Pending", "under review": "Pending",
+        "partial": "Partially Approved", "partially approved": "Partially Approved",
+        "partially paid": "Partially Approved",
+    },
+    ("preauthorizations", "STATUS"): {
+        "approved": "Approved", "modified": "Approved", "partially approved": "Approved",
+        "rejected": "Rejected", "denied": "Rejected", "declined": "Rejected",
+        "pending": "Pending", "under review": "Pending",
+    },
+    ("calls", "CALL_TYPE"): {
+        "complaint": "Complaint", "request": "Request", "inquiry": "Inquiry", "enquiry": "Inquiry",
+        "compliment": "Compliment",
+    },
+    ("members", "STATUS"): {
+        "active": "Active", "suspended": "Suspended", "terminated": "Terminated", "cancelled": "Terminated",
+    },
+}
+
+# Extract arguments -> output tables, in load order
+SOURCES = [
+    ("contracts", "corporate_clients"),
+    ("members", "members"),
+    ("claims", "claims"),
+    ("preauths", "preauthorizations"),
+    ("calls", "calls"),
+]
+
+
+def normalize_header(name):
+    """'Contract Number ' -> 'CONTRACT_NUMBER'"""
+    return re.sub(r"[^0-9A-Z]+", "_", str(name).strip().upper()).strip("_")
+
+
+def resolve_columns(header, table, mapping=None):
+    """
+    {source column: target column} for an extract's header. `mapping` is
+    {target column: source column} and wins over the aliases. Raises
+    ValueError when a required column cannot be found.
+    """
+    by_name = {}
+    for col in header:
+        by_name.setdefault(normalize_header(col), col)
+    mapping = mapping or {}
+
+    resolved = {}
+    for target in TARGET_COLUMNS[table]:
+        if target in mapping:
+            if mapping[target] not in header:
+                raise ValueError(f"{table}: mapped column {mapping[target]!r} for {target} is not in the extract")
+            resolved[mapping[target]] = target
+            continue
+        for candidate in [target] + COLUMN_ALIASES.get(target, []):
+            source = by_name.get(candidate)
+            if source is not None and source not in resolved:
+                resolved[source] = target
+                break
+
+    missing = [col for col in REQUIRED_COLUMNS[table] if col not in resolved.values()]
+    if missing:
+        raise ValueError(f"{table}: no column for {', '.join(missing)} in the extract "
+                         f"(columns: {', '.join(map(str, header))}); map them with --mapping")
+    return resolved
+
+
+def _read_header(path):
+    if path.endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return [cell for cell in next(workbook.active.iter_rows(max_row=1, values_only=True))]
+        finally:
+            workbook.close()
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def iter_extract(path, columns, chunk_size=CHUNK_SIZE):
+    """
+    Chunks of the extract with only the `columns` ({source: target})
+    kept, renamed to the target names. CSV goes through pandas' chunked
+    reader; .xlsx is streamed row by row with openpyxl's read-only mode.
+    """
+    if path.endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = list(next(rows))
+            positions = [header.index(source) for source in columns]
+            names = list(columns.values())
+            batch = []
+            for row in rows:
+                batch.append([row[i] if i < len(row) else None for i in positions])
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame(batch, columns=names)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=names)
+        finally:
+            workbook.close()
+        return
+
+    dtype = {source: str for source, target in columns.items() if target in ID_COLUMNS}
+    for chunk in pd.read_csv(path, usecols=list(columns), dtype=dtype, chunksize=chunk_size):
+        yield chunk.rename(columns=columns)
+
+
+def _parse_dates(values, date_format=None, dayfirst=False):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, format=date_format, dayfirst=dayfirst, errors="coerce")
+
+
+def _parse_numbers(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    text = values.astype(str).str.replace(r"[^0-9.\-]", "", regex=True)
+    return pd.to_numeric(text, errors="coerce")
+
+
+def _parse_booleans(values):
+    """0/1 flags (a float column once a cell is blank) by value, text flags through TRUE_VALUES"""
+    if pd.api.types.is_numeric_dtype(values):
+        return pd.to_numeric(values).fillna(0).astype(bool)
+    text = values.astype(str).str.strip().str.lower()
+    return text.isin(TRUE_VALUES) | (pd.to_numeric(text, errors="coerce").fillna(0) != 0)
+
+
+def _lookup(values, mapping):
+    """Map labels through `mapping` (keyed by lower-cased, stripped label), one lookup per distinct value"""
+    labels = pd.Series(values.dropna().unique())
+    lookup = dict(zip(labels, labels.astype(str).str.strip().str.lower().map(mapping).fillna(labels.astype(str).str.strip())))
+    return values.map(lookup)
+
+
+def normalize_chunk(df, table, date_format=None, dayfirst=False):
+    """
+    (frame, dropped rows): typed columns in TARGET_COLUMNS order, rows
+    missing CONT_NO or the table's date dropped
+    """
+    df = df.copy(deep=False)
+    for col, value in COLUMN_DEFAULTS.get(table, {}).items():
+        if col not in df.columns:
+            df[col] = value
+    if table == "corporate_clients" and "COMPANY_NAME" not in df.columns:
+        df["COMPANY_NAME"] = df["CONT_NO"]
+
+    dates = TABLE_SCHEMAS[table]["dates"]
+    for col in df.columns:
+        if col in ID_COLUMNS:
+            df[col] = df[col].astype("string").str.strip()
+        elif col in dates:
+            df[col] = _parse_dates(df[col], date_format, dayfirst)
+        elif col in NUMERIC_COLUMNS:
+            df[col] = _parse_numbers(df[col])
+        elif col in BOOLEAN_COLUMNS:
+            df[col] = _parse_booleans(df[col])
+        elif (table, col) in VALUE_MAPS:
+            df[col] = _lookup(df[col], VALUE_MAPS[table, col])
+
+    keep = df["CONT_NO"].notna() & (df["CONT_NO"] != "")
+    date_key = TABLE_SCHEMAS[table]["date_key"]
+    if date_key is not None:
+        keep &= df[date_key].notna()
+    dropped = int((~keep).sum())
+    if dropped:
+        df = df[keep.to_numpy()]
+
+    columns = [col for col in TARGET_COLUMNS[table] if col in df.columns]
+    return apply_dtypes(df[columns].reset_index(drop=True), table), dropped
+
+
+def load_mapping(path):
+    """{table: {target column: source column}} from a JSON file (table keys as in SOURCES or table names)"""
+    if not path:
+        return {}
+    with open(path) as f:
+        raw = json.load(f)
+    aliases = dict(SOURCES)
+    return {aliases.get(table, table): columns for table, columns in raw.items()}
+
+
+def parse_date_formats(items):
+    """['%d/%m/%Y', 'claims=%Y%m%d'] -> {None: '%d/%m/%Y', 'claims': '%Y%m%d'} (None = every extract)"""
+    aliases = dict(SOURCES)
+    formats = {}
+    for item in items or []:
+        source, _, fmt = item.rpartition("=") if "=" in item else ("", "", item)
+        formats[aliases.get(source, source) or None] = fmt
+    return formats
+
+
+def ingest(extracts, output_dir, mapping=None, chunk_size=CHUNK_SIZE, date_formats=None, dayfirst=False,
+           parquet=False, partition_by="month", report=None):
+    """
+    Ingest {source name: path} (see SOURCES; contracts, members and claims
+    required) into output_dir. date_formats is {table or None: strftime
+    format} (see parse_date_formats). Returns {table: rows written} plus
+    {table: rows dropped} under "dropped".
+    """
+    report = report or RunReport("ingest_extracts")
+    mapping = mapping or {}
+    date_formats = date_formats or {}
+    for source in ("contracts", "members", "claims"):
+        if not extracts.get(source):
+            raise ValueError(f"The {source} extract is required")
+
+    os.makedirs(output_dir, exist_ok=True)
+    aggregates = combine_aggregates()
+    monthly = combine_aggregates()
+    written, dropped = {}, {}
+    corporate_parts = []
+
+    for source, table in SOURCES:
+        path = extracts.get(source)
+        if not path:
+            continue
+        columns = resolve_columns(_read_header(path), table, mapping.get(table))
+        print(f"Reading {table} from {path} ({len(columns)} mapped columns)")
+
+        writer = None if table == "corporate_clients" else ChunkedTableWriter(
+            table, output_dir, parquet=parquet, partition_by=partition_by, columns=TARGET_COLUMNS[table])
+        chunks = iter_extract(path, columns, chunk_size)
+        while True:
+            with report.stage(f"read/{table}") as stage:
+                raw = next(chunks, None)
+                stage["rows"] = 0 if raw is None else len(raw)
+            if raw is None:
+                break
+            with report.stage(f"normalize/{table}", rows=len(raw)):
+                chunk, lost = normalize_chunk(raw, table, date_formats.get(table, date_formats.get(None)), dayfirst)
+            dropped[table] = dropped.get(table, 0) + lost
+
+            if writer is None:
+                corporate_parts.append(chunk)
+                continue
+
+            empty = {kind: pd.DataFrame() for kind in ("members", "claims", "preauths", "calls")}
+            empty["preauths" if table == "preauthorizations" else table] = chunk
+            with report.stage("ivi_scoring", rows=len(chunk)):
+                aggregates = combine_aggregates(aggregates, contract_aggregates(
+                    empty["members"], empty["claims"], empty["preauths"], empty["calls"]))
+            with report.stage("ivi_period_scoring", rows=len(chunk)):
+                monthly = combine_aggregates(monthly, monthly_aggregates(
+                    empty["members"], empty["claims"], empty["preauths"], empty["calls"]))
+            with report.stage(f"write_chunks/{table}", rows=len(chunk)):
+                writer.write(chunk)
+
+        if writer is not None:
+            writer.close()
+            written[table] = writer.rows
+        print(f"  {written.get(table, sum(len(df) for df in corporate_parts)):,} rows"
+              + (f", {dropped[table]:,} dropped (no contract or date)" if dropped.get(table) else ""))
+
+    corporate_df = pd.concat(corporate_parts, ignore_index=True).drop_duplicates("CONT_NO", keep="last")
+    if "EMPLOYEE_COUNT" not in corporate_df.columns:
+        counts = aggregates["MEMBERS"] if len(aggregates) else pd.Series(dtype=np.int64)
+        corporate_df["EMPLOYEE_COUNT"] = counts.reindex(corporate_df["CONT_NO"].to_numpy(), fill_value=0).to_numpy()
+    written["corporate_clients"] = len(corporate_df)
+
+    with report.stage("ivi_scoring"):
+        ivi_scores_df = scores_from_aggregates(aggregates, corporate_df)
+    with report.stage("ivi_period_scoring"):
+        period_scores_df = period_scores(monthly, corporate_df)
+    print(f"Calculated IVI scores for {len(ivi_scores_df)} contracts, {len(period_scores_df)} period scores")
+
+    for table, df in [("corporate_clients", corporate_df), ("ivi_scores", ivi_scores_df),
+                      ("ivi_period_scores", period_scores_df)]:
+        with report.stage(f"write_csv/{table}", rows=len(df)):
+            df.to_csv(os.path.join(output_dir, f"{table}.csv"), index=False)
+        if parquet:
+            with report.stage(f"write_parquet/{table}", rows=len(df)):
+                write_parquet(df, table, output_dir, partition_by=partition_by)
+    written["ivi_scores"] = len(ivi_scores_df)
+    written["ivi_period_scores"] = len(period_scores_df)
+
+    with report.stage("write_state", rows=len(aggregates)):
+        save_state(state_from_aggregates(corporate_df, aggregates), os.path.join(output_dir, STATE_FILE))
+
+    written["dropped"] = dropped
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest source-system extracts into the IVI tables")
+    parser.add_argument("--contracts", required=True, help="Contracts / policies extract (.csv or .xlsx)")
+    parser.add_argument("--members", required=True, help="Enrollment extract")
+    parser.add_argument("--claims", required=True, help="Claims extract")
+    parser.add_argument("--preauths", default=None, help="Pre-authorization extract")
+    parser.add_argument("--calls", default=None, help="Call-centre / NPS extract")
+    parser.add_argument("--output-dir", default="data", help="Directory for the IVI tables (default: data)")
+    parser.add_argument("--mapping", default=None,
+                        help='JSON {"claims": {"CLAIMED_AMOUNT": "GROSS_AMT"}, ...} naming source columns')
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"Rows per chunk (default: {CHUNK_SIZE})")
+    parser.add_argument("--date-format", action="append", default=[], metavar="[SOURCE=]FORMAT",
+                        help="strftime format of the dates in every extract or in one (claims=%%d/%%m/%%Y); "
+                             "repeatable (default: inferred)")
+    parser.add_argument("--dayfirst", action="store_true", help="Read ambiguous dates as day first")
+    parser.add_argument("--parquet", action="store_true", help="Also write typed Parquet tables")
+    parser.add_argument("--partition-by", choices=PARTITION_MODES, default="month",
+                        help="Parquet partitioning of the dated tables (default: month)")
+    parser.add_argument("--report", default=None, help="Per-stage timing report (default: <output-dir>/run_report.json)")
+    args = parser.parse_args()
+
+    report = RunReport("ingest_extracts", vars(args))
+    extracts = {source: getattr(args, source) for source, _ in SOURCES}
+    written = ingest(extracts, args.output_dir, load_mapping(args.mapping), chunk_size=args.chunk_size,
+                     date_formats=parse_date_formats(args.date_format), dayfirst=args.dayfirst, parquet=args.parquet,
+                     partition_by=args.partition_by, report=report)
+
+    report_path = args.report or os.path.join(args.output_dir, "run_report.json")
+    report.print_summary()
+    report.save(report_path)
+    print(f"✓ Ingested into {args.output_dir}: "
+          + ", ".join(f"{table} {rows:,}" for table, rows in written.items() if table != "dropped"))
+    print(f"✓ Saved: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Incremental IVI scoring for daily loads
+
+Keeps the per-contract running aggregates from ivi_scoring (member, claim,
+rejection, complaint and pre-auth counts, satisfaction and amount sums) in
+a JSON state file. A new day's batch of claims / calls / pre-auths (and
+newly enrolled members) is reduced to aggregates, added to the state, and
+only the contracts that appear in the batch are re-scored, so the cost of an
+update is proportional to the batch rather than the full history.
+
+Batches must contain new records only; a claim that changes status after it
+was loaded has to go through a full rebuild (the `init` command).
+
+Usage:
+    # Build the state from a full data directory (as written by generate_sample_data.py)
+    python scripts/ivi_incremental.py init --data-dir client/public/data
+
+    # Apply one day's files and update ivi_scores.csv in place
+    python scripts/ivi_incremental.py update --data-dir client/public/data \\
+        --claims claims_2025-01-02.csv --calls calls_2025-01-02.csv
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from ivi_scoring import AGGREGATE_COLUMNS, COUNT_COLUMNS, combine_aggregates, contract_aggregates, scores_from_aggregates
+
+STATE_FILE = "ivi_state.json"
+STATE_VERSION = 1
+
+CONTRACT_COLUMNS = ["CONT_NO", "COMPANY_NAME", "SECTOR", "REGION", "PREMIUM_AMOUNT"]
+
+# Only the columns the scoring engine reads are loaded from batch files
+BATCH_COLUMNS = {
+    "members": ["CONT_NO", "HAS_CHRONIC"],
+    "claims": ["CONT_NO", "CLAIMED_AMOUNT", "APPROVED_AMOUNT", "STATUS"],
+    "preauths": ["CONT_NO", "STATUS"],
+    "calls": ["CONT_NO", "CALL_TYPE", "SATISFACTION_SCORE"],
+}
+
+
+def _empty(kind):
+    return pd.DataFrame(columns=BATCH_COLUMNS[kind])
+
+
+def state_from_aggregates(corporate_df, aggregates):
+    return {
+        "contracts": corporate_df[CONTRACT_COLUMNS].reset_index(drop=True),
+        "aggregates": aggregates,
+        "updated_at": datetime.now().isoformat(),
+    }
+
+
+def init_state(corporate_df, members_df, claims_df, preauths_df, calls_df):
+    """Full rebuild of the running aggregates from the complete history"""
+    return state_from_aggregates(corporate_df, contract_aggregates(members_df, claims_df, preauths_df, calls_df))
+
+
+def load_state(path):
+    with open(path) as f:
+        raw = json.load(f)
+
+    if raw.get("version") != STATE_VERSION:
+        raise ValueError(f"Unsupported IVI state version in {path}: {raw.get('version')}")
+
+    aggregates = pd.DataFrame(raw["aggregates"]).set_index("CONT_NO")
+    aggregates = aggregates.reindex(columns=AGGREGATE_COLUMNS, fill_value=0)
+    aggregates[COUNT_COLUMNS] = aggregates[COUNT_COLUMNS].astype(np.int64)
+
+    return {
+        "contracts": pd.DataFrame(raw["contracts"]),
+        "aggregates": aggregates,
+        "updated_at": raw["updated_at"],
+    }
+
+
+def save_state(state, path):
+    payload = {
+        "version": STATE_VERSION,
+        "updated_at": state["updated_at"],
+        "contracts": state["contracts"].to_dict(orient="list"),
+        "aggregates": state["aggregates"].reset_index().to_dict(orient="list"),
+    }
+
+    # Write to a temp file first so a crash never leaves a half-written state
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, default=lambda v: v.item() if hasattr(v, "item") else str(v))
+    os.replace(tmp_path, path)
+
+
+def apply_batch(state, members_df=None, claims_df=None, preauths_df=None, calls_df=None):
+    """
+    Add a batch of new records to the running aggregates.
+    Returns the updated state and the CONT_NOs touched by the batch.
+    """
+    delta = contract_aggregates(
+        members_df if members_df is not None else _empty("members"),
+        claims_df if claims_df is not None else _empty("claims"),
+        preauths_df if preauths_df is not None else _empty("preauths"),
+        calls_df if calls_df is not None else _empty("calls"),
+    )
+
+    unknown = delta.index.difference(state["contracts"]["CONT_NO"])
+    if len(unknown):
+        raise ValueError(f"Batch references {len(unknown)} unknown contracts, e.g. {list(unknown[:5])}")
+
+    state = dict(state)
+    state["aggregates"] = combine_aggregates(state["aggregates"], delta)
+    state["updated_at"] = datetime.now().isoformat()
+    return state, delta.index
+
+
+def rescore(state, cont_nos):
+    """IVI scores for just the given contracts"""
+    contracts = state["contracts"]
+    contracts = contracts[contracts["CONT_NO"].isin(cont_nos)]
+    aggregates = state["aggregates"].reindex(contracts["CONT_NO"].to_numpy(), fill_value=0)
+    return scores_from_aggregates(aggregates, contracts)
+
+
+def merge_scores(scores_df, updated_df):
+    """Replace the rows of updated contracts in an existing ivi_scores frame"""
+    keep = scores_df[~scores_df["CONT_NO"].isin(updated_df["CONT_NO"])]
+    merged = pd.concat([keep, updated_df], ignore_index=True)
+    order = {cont_no: i for i, cont_no in enumerate(scores_df["CONT_NO"])}
+    return merged.sort_values("CONT_NO", key=lambda s: s.map(order).fillna(len(order))).reset_index(drop=True)
+
+
+def _read_batch(path, kind):
+    if not path:
+        return None
+    if path.endswith(".json"):
+        return pd.read_json(path)[BATCH_COLUMNS[kind]]
+    return pd.read_csv(path, usecols=BATCH_COLUMNS[kind])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental IVI scoring")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    init_cmd = sub.add_parser("init", help="Build the state file from a full data directory")
+    init_cmd.add_argument("--data-dir", required=True)
+    init_cmd.add_argument("--state", default=None, help=f"State file (default: <data-dir>/{STATE_FILE})")
+
+    update_cmd = sub.add_parser("update", help="Apply a batch of new records")
+    update_cmd.add_argument("--data-dir", required=True, help="Directory holding ivi_scores.csv")
+    update_cmd.add_argument("--state", default=None, help=f"State file (default: <data-dir>/{STATE_FILE})")
+    update_cmd.add_argument("--members", help="New members CSV/JSON")
+    update_cmd.add_argument("--claims", help="New claims CSV/JSON")
+    update_cmd.add_argument("--preauths", help="New pre-authorizations CSV/JSON")
+    update_cmd.add_argument("--calls", help="New call center interactions CSV/JSON")
+
+    args = parser.parse_args()
+    state_path = args.state or os.path.join(args.data_dir, STATE_FILE)
+
+    if args.command == "init":
+        start = time.perf_counter()
+        state = init_state(
+            pd.read_csv(f"{args.data_dir}/corporate_clients.csv"),
+            pd.read_csv(f"{args.data_dir}/members.csv", usecols=BATCH_COLUMNS["members"]),
+            pd.read_csv(f"{args.data_dir}/claims.csv", usecols=BATCH_COLUMNS["claims"]),
+            pd.read_csv(f"{args.data_dir}/preauthorizations.csv", usecols=BATCH_COLUMNS["preauths"]),
+            pd.read_csv(f"{args.data_dir}/calls.csv", usecols=BATCH_COLUMNS["calls"]),
+        )
+        save_state(state, state_path)
+        print(f"Built IVI state for {len(state['contracts'])} contracts in {time.perf_counter() - start:.2f}s")
+        print(f"✓ Saved: {state_path}")
+        return
+
+    start = time.perf_counter()
+    state = load_state(state_path)
+    batch = {kind: _read_batch(getattr(args, kind), kind) for kind in BATCH_COLUMNS}
+    batch_rows = sum(len(df) for df in batch.values() if df is not None)
+
+    state, affected = apply_batch(
+        state,
+        members_df=batch["members"],
+        claims_df=batch["claims"],
+        preauths_df=batch["preauths"],
+        calls_df=batch["calls"],
+    )
+    updated = rescore(state, affected)
+
+    scores_path = f"{args.data_dir}/ivi_scores.csv"
+    scores_df = pd.read_csv(scores_path) if os.path.exists(scores_path) else updated.iloc[:0]
+    merge_scores(scores_df, updated).to_csv(scores_path, index=False)
+    save_state(state, state_path)
+
+    print(f"Applied {batch_rows} new rows, re-scored {len(updated)} contracts in {time.perf_counter() - start:.3f}s")
+    print(f"✓ Saved: {scores_path}")
+    print(f"✓ Saved: {state_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Time-windowed IVI scores
+
+Scores every contract per calendar month, per quarter and over rolling
+3- and 12-month windows, filling the calculation_period column of the
+ivi_scores schema (see DATA_INTEGRATION_GUIDE.md).
+
+The raw tables are reduced once to additive (CONT_NO, MONTH) aggregates
+(contract_aggregates(..., by_month=True), keyed on CLAIM_DATE, REQUEST_DATE,
+CRT_DATE and ENROLLMENT_DATE). Those are laid out as a dense
+contracts x months cube and summed along the month axis, so the total over
+any window is the difference of two cumulative sums and every period of
+every type costs the same O(1) per contract, however long the history.
+Member counts are stocks rather than flows: a window uses the members
+enrolled by its last month. The annual premium is prorated by the number
+of months the window covers. Windows before a contract's first enrolment
+have no members to rate against: they keep their row (every contract has
+every window) with SCORED False and no scores, rates or risk category.
+
+Usage:
+    python scripts/ivi_periods.py --data-dir data          # writes data/ivi_period_scores.csv
+    python scripts/ivi_periods.py --benchmark              # 300 contracts x 24 months
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from ivi_scoring import (AGGREGATE_COLUMNS, DATE_COLUMNS, E_WEIGHT, H_WEIGHT, U_WEIGHT, component_scores,
+                         contract_aggregates, risk_category)
+
+# Members and chronic members are enrolled-to-date counts, everything else sums over the window
+STOCK_COLUMNS = ["MEMBERS", "CHRONIC_MEMBERS"]
+
+# PERIOD_TYPE -> window length in months (quarters are calendar quarters)
+PERIOD_TYPES = {
+    "month": 1,
+    "quarter": 3,
+    "rolling_3m": 3,
+    "rolling_12m": 12,
+}
+
+PERIOD_SCORE_COLUMNS = [
+    "CONT_NO", "COMPANY_NAME", "PERIOD_TYPE", "CALCULATION_PERIOD", "PERIOD_START", "PERIOD_END", "MONTHS",
+    "EMPLOYEE_COUNT", "TOTAL_CLAIMS", "TOTAL_CLAIMED", "TOTAL_APPROVED",
+    "SCORED", "H_SCORE", "E_SCORE", "U_SCORE", "IVI_SCORE", "RISK_CATEGORY",
+    "CHRONIC_RATE", "COMPLAINT_RATE", "REJECTION_RATE", "LOSS_RATIO",
+]
+
+# Columns left empty in windows without enrolled members
+UNSCORED_COLUMNS = ["H_SCORE", "E_SCORE", "U_SCORE", "IVI_SCORE", "RISK_CATEGORY",
+                    "CHRONIC_RATE", "COMPLAINT_RATE", "REJECTION_RATE", "LOSS_RATIO"]
+
+# Columns read from the CSV outputs (ivi_incremental.BATCH_COLUMNS plus the date keys)
+INPUT_COLUMNS = {
+    "members": ["CONT_NO", "HAS_CHRONIC", "ENROLLMENT_DATE"],
+    "claims": ["CONT_NO", "CLAIMED_AMOUNT", "APPROVED_AMOUNT", "STATUS", "CLAIM_DATE"],
+    "preauths": ["CONT_NO", "STATUS", "REQUEST_DATE"],
+    "calls": ["CONT_NO", "CALL_TYPE", "SATISFACTION_SCORE", "CRT_DATE"],
+}
+
+
+def monthly_aggregates(members_df, claims_df, preauths_df, calls_df):
+    """Additive aggregates per (CONT_NO, MONTH); MONTH counts months since 1970-01"""
+    return contract_aggregates(members_df, claims_df, preauths_df, calls_df, by_month=True)
+
+
+def aggregate_cube(monthly, contracts, first_month=None, last_month=None):
+    """
+    Dense (contract, month, AGGREGATE_COLUMNS) array from monthly aggregates,
+    covering first_month..last_month (default: the months present).
+    Months outside the range are dropped.
+    """
+    if len(monthly) == 0:
+        monthly = pd.DataFrame(columns=AGGREGATE_COLUMNS,
+                               index=pd.MultiIndex.from_arrays([[], []], names=["CONT_NO", "MONTH"]))
+    months = monthly.index.get_level_values("MONTH").to_numpy(dtype=np.int64)
+    if first_month is None:
+        first_month = int(months.min()) if len(months) else 0
+    if last_month is None:
+        last_month = int(months.max()) if len(months) else first_month - 1
+
+    cube = np.zeros((len(contracts), last_month - first_month + 1, len(AGGREGATE_COLUMNS)))
+    rows = pd.Index(contracts).get_indexer(monthly.index.get_level_values("CONT_NO"))
+    keep = (rows >= 0) & (months >= first_month) & (months <= last_month)
+    np.add.at(cube, (rows[keep], months[keep] - first_month),
+              monthly[AGGREGATE_COLUMNS].to_numpy(dtype=float)[keep])
+    return cube, first_month
+
+
+def period_windows(first_month, num_months, period_types=PERIOD_TYPES):
+    """
+    (PERIOD_TYPE, start, end) month offsets of every window. Windows that
+    would reach before first_month are clipped to it, and a quarter still
+    in progress at the last month ends there.
+    """
+    ends = np.arange(num_months)
+    windows = []
+    for period_type in period_types:
+        length = PERIOD_TYPES[period_type]
+        if period_type == "quarter":
+            absolute = ends + first_month
+            period_ends = ends[(absolute % 3 == 2) | (ends == num_months - 1)]
+            starts = np.maximum(period_ends - (period_ends + first_month) % 3, 0)
+        else:
+            period_ends = ends
+            starts = np.maximum(period_ends - length + 1, 0)
+        windows.extend((period_type, int(s), int(e)) for s, e in zip(starts, period_ends))
+    return windows
+
+
+def _month_label(month):
+    return f"{1970 + month // 12}-{month % 12 + 1:02d}"
+
+
+def period_label(period_type, start_month, end_month):
+    """CALCULATION_PERIOD text: '2024-03', 'Q1-2024', 'R3M-2024-03', 'R12M-2024-03'"""
+    if period_type == "month":
+        return _month_label(end_month)
+    if period_type == "quarter":
+        return f"Q{end_month % 12 // 3 + 1}-{1970 + end_month // 12}"
+    return f"R{PERIOD_TYPES[period_type]}M-{_month_label(end_month)}"
+
+
+def period_scores(monthly, corporate_df, period_types=PERIOD_TYPES, first_month=None, last_month=None):
+    """
+    ivi_period_scores frame: one row per contract in corporate_df and
+    window of each requested period type, rows grouped by contract.
+    """
+    contracts = corporate_df["CONT_NO"].to_numpy()
+    cube, first_month = aggregate_cube(monthly, contracts, first_month, last_month)
+    num_contracts, num_months, _ = cube.shape
+
+    # Running totals along the month axis with a leading zero month:
+    # window (start, end) = totals[end + 1] - totals[start]
+    totals = np.zeros((num_contracts, num_months + 1, cube.shape[2]))
+    np.cumsum(cube, axis=1, out=totals[:, 1:])
+
+    windows = period_windows(first_month, num_months, period_types)
+    starts = np.array([w[1] for w in windows], dtype=np.int64)
+    ends = np.array([w[2] for w in windows], dtype=np.int64)
+    covered = ends - starts + 1
+
+    sums = totals[:, ends + 1] - totals[:, starts]
+    stock = [AGGREGATE_COLUMNS.index(c) for c in STOCK_COLUMNS]
+    sums[:, :, stock] = totals[:, ends + 1][:, :, stock]
+
+    aggregates = {col: sums[:, :, i].ravel() for i, col in enumerate(AGGREGATE_COLUMNS)}
+    annual_premium = corporate_df["PREMIUM_AMOUNT"].to_numpy(dtype=float)
+    premium = (annual_premium[:, None] * covered[None, :] / 12).ravel()
+    components = component_scores(aggregates, premium)
+
+    ivi_score = (components["H_SCORE"] * H_WEIGHT) + (components["E_SCORE"] * E_WEIGHT) + (components["U_SCORE"] * U_WEIGHT)
+
+    num_windows = len(windows)
+    month_starts = (np.arange(num_months) + first_month).astype("datetime64[M]")
+    labels = [period_label(t, s + first_month, e + first_month) for t, s, e in windows]
+
+    scores = pd.DataFrame({
+        "CONT_NO": np.repeat(contracts, num_windows),
+        "COMPANY_NAME": np.repeat(corporate_df["COMPANY_NAME"].to_numpy(), num_windows),
+        "PERIOD_TYPE": pd.Categorical(np.tile([w[0] for w in windows], num_contracts), categories=list(period_types)),
+        "CALCULATION_PERIOD": np.tile(labels, num_contracts),
+        "PERIOD_START": np.tile(month_starts[starts].astype("datetime64[ns]"), num_contracts),
+        "PERIOD_END": np.tile(((month_starts[ends] + 1).astype("datetime64[D]") - 1).astype("datetime64[ns]"),
+                              num_contracts),
+        "MONTHS": np.tile(covered, num_contracts).astype(np.int8),
+        "EMPLOYEE_COUNT": aggregates["MEMBERS"].astype(np.int64),
+        "TOTAL_CLAIMS": aggregates["CLAIMS"].astype(np.int64),
+        "TOTAL_CLAIMED": aggregates["TOTAL_CLAIMED"],
+        "TOTAL_APPROVED": aggregates["TOTAL_APPROVED"],
+        "H_SCORE": np.round(components["H_SCORE"], 2),
+        "E_SCORE": np.round(components["E_SCORE"], 2),
+        "U_SCORE": np.round(components["U_SCORE"], 2),
+        "IVI_SCORE": np.round(ivi_score, 2),
+        "RISK_CATEGORY": risk_category(ivi_score),
+        "CHRONIC_RATE": np.round(components["CHRONIC_RATE"], 2),
+        "COMPLAINT_RATE": np.round(components["COMPLAINT_RATE"], 2),
+        "REJECTION_RATE": np.round(components["REJECTION_RATE"], 2),
+        "LOSS_RATIO": np.round(components["LOSS_RATIO"], 2),
+        "SCORED": aggregates["MEMBERS"] > 0,
+    })
+    # Zero-member denominators give a 0 chronic rate and an inflated H score: no score at all instead
+    scores.loc[~scores["SCORED"], UNSCORED_COLUMNS] = np.nan
+    return scores[PERIOD_SCORE_COLUMNS]
+
+
+def calculate_period_scores(corporate_df, members_df, claims_df, preauths_df, calls_df, period_types=PERIOD_TYPES):
+    """IVI scores per contract and period straight from the raw tables"""
+    monthly = monthly_aggregates(members_df, claims_df, preauths_df, calls_df)
+    return period_scores(monthly, corporate_df, period_types)
+
+
+def load_tables(data_dir):
+    """corporate_clients plus the date-keyed columns of the generated CSVs"""
+    files = {"members": "members", "claims": "claims", "preauths": "preauthorizations", "calls": "calls"}
+    tables = {
+        kind: pd.read_csv(f"{data_dir}/{name}.csv", usecols=INPUT_COLUMNS[kind], parse_dates=[DATE_COLUMNS[kind]])
+        for kind, name in files.items()
+    }
+    corporate_df = pd.read_csv(f"{data_dir}/corporate_clients.csv")
+    return corporate_df, tables["members"], tables["claims"], tables["preauths"], tables["calls"]
+
+
+def _synthetic_inputs(num_contracts, num_months, num_claims, rng):
+    """Random date-keyed tables spanning num_months months from 2023-01"""
+    from ivi_scoring import _synthetic_inputs as undated
+
+    corporate_df, members_df, claims_df, preauths_df, calls_df = undated(num_contracts, num_claims, rng)
+    first = np.datetime64("2023-01-01")
+    days = ((first.astype("datetime64[M]") + num_months).astype("datetime64[D]") - first).astype(np.int64)
+    for df, col in [(members_df, "ENROLLMENT_DATE"), (claims_df, "CLAIM_DATE"),
+                    (preauths_df, "REQUEST_DATE"), (calls_df, "CRT_DATE")]:
+        df[col] = first + rng.integers(0, days, size=len(df)).astype("timedelta64[D]")
+    return corporate_df, members_df, claims_df, preauths_df, calls_df
+
+
+def benchmark(num_contracts=300, num_months=24, sizes=(250000, 1000000), repeat=3):
+    """Time the monthly aggregation and the windowed scoring separately"""
+    rng = np.random.default_rng(42)
+    print(f"IVI period scoring benchmark ({num_contracts} contracts x {num_months} months, best of {repeat})")
+    print(f"{'claims':>10} {'rows out':>9} {'aggregate s':>12} {'score s':>9}")
+
+    for num_claims in sizes:
+        corporate_df, *tables = _synthetic_inputs(num_contracts, num_months, num_claims, rng)
+        best_aggregate = best_score = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            monthly = monthly_aggregates(*tables)
+            middle = time.perf_counter()
+            scores = period_scores(monthly, corporate_df)
+            best_aggregate = min(best_aggregate, middle - start)
+            best_score = min(best_score, time.perf_counter() - middle)
+        print(f"{num_claims:>10,} {len(scores):>9,} {best_aggregate:>12.3f} {best_score:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVI scores per month, quarter and rolling window")
+    parser.add_argument("--data-dir", default="data", help="Directory with the generated CSVs (default: data)")
+    parser.add_argument("--output", default=None, help="Output CSV (default: <data-dir>/ivi_period_scores.csv)")
+    parser.add_argument("--periods", nargs="+", choices=list(PERIOD_TYPES), default=list(PERIOD_TYPES),
+                        help="Period types to score (default: all)")
+    parser.add_argument("--benchmark", action="store_true", help="Time 300 contracts x 24 months of synthetic data")
+    parser.add_argument("--contracts", type=int, default=300, help="Contracts in the benchmark portfolio")
+    parser.add_argument("--months", type=int, default=24, help="Months of history in the benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(num_contracts=args.contracts, num_months=args.months)
+        return
+
+    scores = calculate_period_scores(*load_tables(args.data_dir), period_types=args.periods)
+    output = args.output or os.path.join(args.data_dir, "ivi_period_scores.csv")
+    scores.to_csv(output, index=False)
+    print(f"✓ Saved: {output} ({len(scores):,} rows, {scores['CALCULATION_PERIOD'].nunique()} periods)")
+
+
+if __name__ == "__main__":
+    main()
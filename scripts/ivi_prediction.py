@@ -0,0 +1,260 @@
+"""
+Future IVI prediction and feature importance
+
+Fits a ridge regression on the windowed scores from ivi_periods.py: the
+H/E/U scores and their rate inputs for a contract's window ending in month
+t are the features, the IVI of the same-length window ending `horizon`
+months later is the target. Every contract contributes one training row
+per complete window pair, so the whole portfolio is fitted with a single
+closed-form solve on standardized features.
+
+The fitted model (feature means, scales, coefficients) is cached as JSON
+next to the data. Predicting applies it to each contract's latest window
+in one matrix product, which is what create_powerbi_files.py reads as
+future_predictions.csv (FUTURE_IVI_SCORE, IMPROVEMENT) and
+feature_importance.csv (Feature, Importance = share of the absolute
+standardized coefficients). CURRENT_IVI_SCORE is the latest window's score,
+not the annual IVI_SCORE; rebase_predictions() carries the predicted change
+over to the annual scores where the two are shown together.
+
+Usage:
+    # Predict from <data-dir>/ivi_period_scores.csv, fitting the model only when none is cached
+    python scripts/ivi_prediction.py --data-dir data
+    python scripts/ivi_prediction.py --data-dir data --refit --horizon 6
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from ivi_periods import PERIOD_TYPES
+from ivi_scoring import risk_category
+
+MODEL_FILE = "ivi_model.json"
+MODEL_VERSION = 1
+
+# Window scores the model is fitted on, and how far ahead it predicts
+DEFAULT_PERIOD_TYPE = "rolling_3m"
+DEFAULT_HORIZON = 3  # months
+RIDGE_ALPHA = 1.0
+
+FEATURES = [
+    "H_SCORE", "E_SCORE", "U_SCORE",
+    "CHRONIC_RATE", "COMPLAINT_RATE", "REJECTION_RATE", "LOSS_RATIO", "CLAIMS_PER_MEMBER",
+]
+
+PREDICTION_COLUMNS = [
+    "CONT_NO", "BASE_PERIOD", "HORIZON_MONTHS", "CURRENT_IVI_SCORE", "FUTURE_IVI_SCORE", "IMPROVEMENT",
+    "FUTURE_RISK_CATEGORY",
+]
+
+
+def window_panel(period_scores_df, period_type=DEFAULT_PERIOD_TYPE):
+    """
+    Windows of one period type as (contract, window) arrays: CONT_NO,
+    CALCULATION_PERIOD labels, feature cube, IVI scores and a mask of
+    complete, scored windows (covering the full period length, with enrolled
+    members).
+    """
+    df = period_scores_df[period_scores_df["PERIOD_TYPE"] == period_type]
+    df = df.sort_values(["CONT_NO", "PERIOD_END"], kind="stable")
+    contracts = pd.unique(df["CONT_NO"].to_numpy())
+    shape = (len(contracts), len(df) // max(len(contracts), 1))
+    if shape[0] * shape[1] != len(df):
+        raise ValueError(f"{period_type} windows differ between contracts")
+
+    members = df["EMPLOYEE_COUNT"].to_numpy(dtype=float)
+    columns = {col: df[col].to_numpy(dtype=float) for col in FEATURES if col != "CLAIMS_PER_MEMBER"}
+    columns["CLAIMS_PER_MEMBER"] = np.divide(df["TOTAL_CLAIMS"].to_numpy(dtype=float), members,
+                                             out=np.zeros(len(df)), where=members > 0)
+
+    return {
+        "contracts": contracts,
+        "periods": df["CALCULATION_PERIOD"].to_numpy().reshape(shape),
+        "features": np.stack([columns[col] for col in FEATURES], axis=-1).reshape(shape + (len(FEATURES),)),
+        "ivi": df["IVI_SCORE"].to_numpy(dtype=float).reshape(shape),
+        "complete": ((df["MONTHS"].to_numpy() == PERIOD_TYPES[period_type])
+                     & df["IVI_SCORE"].notna().to_numpy()).reshape(shape),
+    }
+
+
+def training_set(panel, horizon=DEFAULT_HORIZON):
+    """(X, y): features of each complete window and the IVI `horizon` windows later"""
+    if horizon < 1 or horizon >= panel["ivi"].shape[1]:
+        return np.empty((0, len(FEATURES))), np.empty(0)
+    mask = panel["complete"][:, :-horizon] & panel["complete"][:, horizon:]
+    return panel["features"][:, :-horizon][mask], panel["ivi"][:, horizon:][mask]
+
+
+def fit_ridge(X, y, alpha=RIDGE_ALPHA):
+    """Closed-form ridge regression on standardized features (the intercept is not penalized)"""
+    if len(y) <= X.shape[1]:
+        raise ValueError(f"Not enough history to fit the IVI model: {len(y)} training rows for "
+                         f"{X.shape[1]} features (need more months than the horizon + window)")
+
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = (X - mean) / scale
+    intercept = y.mean()
+
+    coef = np.linalg.solve(Z.T @ Z + alpha * np.eye(Z.shape[1]), Z.T @ (y - intercept))
+    residual = y - (Z @ coef + intercept)
+    total = ((y - intercept) ** 2).sum()
+    return {
+        "mean": mean,
+        "scale": scale,
+        "coef": coef,
+        "intercept": float(intercept),
+        "r2": float(1 - (residual ** 2).sum() / total) if total > 0 else 0.0,
+        "rmse": float(np.sqrt((residual ** 2).mean())),
+    }
+
+
+def fit_model(period_scores_df, period_type=DEFAULT_PERIOD_TYPE, horizon=DEFAULT_HORIZON, alpha=RIDGE_ALPHA):
+    X, y = training_set(window_panel(period_scores_df, period_type), horizon)
+    model = fit_ridge(X, y, alpha)
+    model.update({
+        "version": MODEL_VERSION,
+        "features": list(FEATURES),
+        "period_type": period_type,
+        "horizon": horizon,
+        "alpha": alpha,
+        "training_rows": len(y),
+        "fitted_at": datetime.now().isoformat(),
+    })
+    return model
+
+
+def save_model(model, path):
+    payload = {key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in model.items()}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_model(path):
+    with open(path) as f:
+        model = json.load(f)
+    if model.get("version") != MODEL_VERSION:
+        raise ValueError(f"Unsupported IVI model version in {path}: {model.get('version')}")
+    if model["features"] != FEATURES:
+        raise ValueError(f"IVI model in {path} was fitted on different features: {model['features']}")
+    for key in ("mean", "scale", "coef"):
+        model[key] = np.asarray(model[key], dtype=float)
+    return model
+
+
+def predict(model, features):
+    """IVI predicted from a (..., len(FEATURES)) array, clipped to 0-100"""
+    z = (features - model["mean"]) / model["scale"]
+    return np.clip(z @ model["coef"] + model["intercept"], 0, 100)
+
+
+def future_predictions(model, period_scores_df):
+    """
+    FUTURE_IVI_SCORE per contract from its latest window of the model's
+    period type; NaN (no risk category) when that window is unscored
+    """
+    panel = window_panel(period_scores_df, model["period_type"])
+    current = panel["ivi"][:, -1]
+    future = predict(model, panel["features"][:, -1])
+    return pd.DataFrame({
+        "CONT_NO": panel["contracts"],
+        "BASE_PERIOD": panel["periods"][:, -1],
+        "HORIZON_MONTHS": model["horizon"],
+        "CURRENT_IVI_SCORE": current,
+        "FUTURE_IVI_SCORE": np.round(future, 2),
+        "IMPROVEMENT": np.round(future - current, 2),
+        "FUTURE_RISK_CATEGORY": np.where(np.isnan(future), None, risk_category(future)),
+    })[PREDICTION_COLUMNS]
+
+
+def rebase_predictions(predictions, ivi_scores):
+    """
+    Predictions moved onto the basis of ivi_scores.IVI_SCORE: each contract's
+    predicted change from its latest window is applied to its IVI_SCORE, so
+    FUTURE_IVI_SCORE and IMPROVEMENT can sit next to the annual scores.
+    Frames without CURRENT_IVI_SCORE are returned unchanged.
+    """
+    if "CURRENT_IVI_SCORE" not in predictions.columns:
+        return predictions
+    base = predictions["CONT_NO"].map(ivi_scores.set_index("CONT_NO")["IVI_SCORE"])
+    current = base.fillna(predictions["CURRENT_IVI_SCORE"]).to_numpy(dtype=float)
+    future = np.clip(current + predictions["FUTURE_IVI_SCORE"] - predictions["CURRENT_IVI_SCORE"], 0, 100)
+    rebased = predictions.copy()
+    rebased["CURRENT_IVI_SCORE"] = current
+    rebased["FUTURE_IVI_SCORE"] = np.round(future, 2)
+    rebased["IMPROVEMENT"] = np.round(future - current, 2)
+    if "FUTURE_RISK_CATEGORY" in rebased.columns:
+        rebased["FUTURE_RISK_CATEGORY"] = risk_category(future)
+    return rebased
+
+
+def feature_importance(model):
+    """Share of each feature in the absolute standardized coefficients"""
+    weight = np.abs(model["coef"])
+    total = weight.sum()
+    importance = weight / total if total > 0 else np.full(len(weight), 1 / len(weight))
+    return (pd.DataFrame({"Feature": model["features"], "Importance": np.round(importance, 4)})
+            .sort_values("Importance", ascending=False, kind="stable")
+            .reset_index(drop=True))
+
+
+def run_predictions(period_scores_df, model_path=None, refit=True, period_type=DEFAULT_PERIOD_TYPE,
+                    horizon=DEFAULT_HORIZON, alpha=RIDGE_ALPHA):
+    """
+    (future_predictions, feature_importance, model). The cached model at
+    model_path is reused unless refit is set or it does not match the
+    requested period type / horizon; a freshly fitted model is saved there.
+    """
+    model = None
+    if model_path and not refit and os.path.exists(model_path):
+        cached = load_model(model_path)
+        if cached["period_type"] == period_type and cached["horizon"] == horizon:
+            model = cached
+
+    if model is None:
+        model = fit_model(period_scores_df, period_type, horizon, alpha)
+        if model_path:
+            save_model(model, model_path)
+
+    return future_predictions(model, period_scores_df), feature_importance(model), model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict future IVI scores from the windowed scores")
+    parser.add_argument("--data-dir", default="data", help="Directory with ivi_period_scores.csv (default: data)")
+    parser.add_argument("--model", default=None, help=f"Cached model file (default: <data-dir>/{MODEL_FILE})")
+    parser.add_argument("--refit", action="store_true", help="Fit a new model even when one is cached")
+    parser.add_argument("--period-type", choices=list(PERIOD_TYPES), default=DEFAULT_PERIOD_TYPE,
+                        help=f"Windows the model is fitted on (default: {DEFAULT_PERIOD_TYPE})")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON,
+                        help=f"Months ahead to predict (default: {DEFAULT_HORIZON})")
+    parser.add_argument("--alpha", type=float, default=RIDGE_ALPHA, help=f"Ridge penalty (default: {RIDGE_ALPHA})")
+    args = parser.parse_args()
+
+    period_scores_df = pd.read_csv(os.path.join(args.data_dir, "ivi_period_scores.csv"))
+    model_path = args.model or os.path.join(args.data_dir, MODEL_FILE)
+
+    start = time.perf_counter()
+    predictions, importance, model = run_predictions(period_scores_df, model_path, refit=args.refit,
+                                                     period_type=args.period_type, horizon=args.horizon,
+                                                     alpha=args.alpha)
+    elapsed = time.perf_counter() - start
+
+    predictions.to_csv(os.path.join(args.data_dir, "future_predictions.csv"), index=False)
+    importance.to_csv(os.path.join(args.data_dir, "feature_importance.csv"), index=False)
+    print(f"Predicted IVI {model['horizon']} months ahead for {len(predictions)} contracts in {elapsed * 1000:.1f} ms "
+          f"(model fitted {model['fitted_at']} on {model['training_rows']} windows, R² {model['r2']:.3f})")
+    print(f"✓ Saved: {os.path.join(args.data_dir, 'future_predictions.csv')}")
+    print(f"✓ Saved: {os.path.join(args.data_dir, 'feature_importance.csv')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+What-if evaluation of IVI weights and thresholds
+
+Re-scores every contract under a batch of scenarios at once. A scenario
+sets any of the H/E/U weights, the target loss ratio, the Low / Medium risk
+cutoffs and percentage adjustments to the H/E/U scores (as in the
+dashboard's saved scenarios). The H and E scores and the loss ratio per
+contract are taken from ivi_scores as they are; U is re-derived from the
+loss ratio for each scenario's target. All scenarios are then evaluated as
+(scenarios x contracts) matrix operations, and the risk-category migration
+against the baseline (the constants in ivi_scoring.py) is counted with one
+bincount, so thousands of scenarios take milliseconds.
+
+Weights are normalized to sum to 1 within each scenario.
+
+Scenarios come from a CSV / JSON list (one scenario per row / object) or a
+JSON grid whose values are lists, expanded to every combination:
+
+    {"H_WEIGHT": [0.3, 0.35, 0.4], "TARGET_LOSS_RATIO": [60, 70, 80],
+     "LOW_RISK_THRESHOLD": [65, 70, 75]}
+
+Usage:
+    python scripts/ivi_scenarios.py --data-dir data --grid grid.json
+    python scripts/ivi_scenarios.py --data-dir data --scenarios scenarios.csv --contract-scores
+    python scripts/ivi_scenarios.py --benchmark
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from ivi_scoring import (E_WEIGHT, H_WEIGHT, LOW_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD, TARGET_LOSS_RATIO,
+                         U_WEIGHT)
+from pipeline_io import read_table
+
+# Scenario parameters and their baseline values
+BASELINE = {
+    "H_WEIGHT": H_WEIGHT,
+    "E_WEIGHT": E_WEIGHT,
+    "U_WEIGHT": U_WEIGHT,
+    "TARGET_LOSS_RATIO": TARGET_LOSS_RATIO,
+    "LOW_RISK_THRESHOLD": LOW_RISK_THRESHOLD,
+    "MEDIUM_RISK_THRESHOLD": MEDIUM_RISK_THRESHOLD,
+    "H_ADJUSTMENT": 0.0,  # % change applied to H_SCORE (-100 to +100)
+    "E_ADJUSTMENT": 0.0,
+    "U_ADJUSTMENT": 0.0,
+}
+
+# Risk categories by code (order used in the migration counts)
+RISK_LEVELS = ["High", "Medium", "Low"]
+
+# Scenarios evaluated per matrix block, bounding memory at
+# CHUNK_SIZE x contracts floats per intermediate
+CHUNK_SIZE = 4096
+
+DEFAULT_GRID = {
+    "H_WEIGHT": [0.25, 0.3, 0.35, 0.4, 0.45],
+    "E_WEIGHT": [0.25, 0.3, 0.35, 0.4, 0.45],
+    "U_WEIGHT": [0.2, 0.25, 0.3, 0.35, 0.4],
+    "TARGET_LOSS_RATIO": [60, 65, 70, 75, 80],
+    "LOW_RISK_THRESHOLD": [65, 70, 75],
+    "MEDIUM_RISK_THRESHOLD": [45, 50, 55],
+}
+
+
+def expand_grid(grid):
+    """Scenario frame with one row per combination of the grid's value lists"""
+    names = list(grid)
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in grid.values()]
+    return scenario_frame(pd.DataFrame(list(itertools.product(*values)), columns=names))
+
+
+def scenario_frame(scenarios):
+    """Fill unspecified parameters with the baseline and number the scenarios"""
+    scenarios = pd.DataFrame(scenarios)
+    unknown = [c for c in scenarios.columns if c not in BASELINE and c not in ("SCENARIO_ID", "NAME")]
+    if unknown:
+        raise ValueError(f"Unknown scenario parameters: {', '.join(unknown)}")
+
+    for name, value in BASELINE.items():
+        scenarios[name] = scenarios[name].fillna(value).astype(float) if name in scenarios else float(value)
+    if "SCENARIO_ID" not in scenarios:
+        scenarios.insert(0, "SCENARIO_ID", np.arange(1, len(scenarios) + 1))
+    return scenarios.reset_index(drop=True)
+
+
+def load_scenarios(path):
+    """Scenarios from a CSV, a JSON list of objects, or a JSON grid of value lists"""
+    if path.endswith(".csv"):
+        return scenario_frame(pd.read_csv(path))
+    with open(path) as f:
+        payload = json.load(f)
+    if isinstance(payload, dict):
+        return expand_grid(payload)
+    return scenario_frame(pd.DataFrame(payload))
+
+
+def _risk_codes(ivi, low, medium):
+    """0 = High, 1 = Medium, 2 = Low (see RISK_LEVELS)"""
+    return (ivi >= medium).astype(np.int8) + (ivi >= low)
+
+
+def score_matrix(components, params):
+    """
+    IVI scores and risk codes for every scenario (rows) and contract
+    (columns). `components` holds H_SCORE, E_SCORE and LOSS_RATIO arrays per
+    contract, `params` the BASELINE parameters as arrays per scenario.
+    """
+    def col(name):
+        return np.asarray(params[name], dtype=float)[:, None]
+
+    h = np.clip(components["H_SCORE"][None, :] * (1 + col("H_ADJUSTMENT") / 100), 0, 100)
+    e = np.clip(components["E_SCORE"][None, :] * (1 + col("E_ADJUSTMENT") / 100), 0, 100)
+    u = np.clip(100 - (components["LOSS_RATIO"][None, :] - col("TARGET_LOSS_RATIO")) * 2, 0, 100)
+    u = np.clip(u * (1 + col("U_ADJUSTMENT") / 100), 0, 100)
+
+    weights = col("H_WEIGHT") + col("E_WEIGHT") + col("U_WEIGHT")
+    weights[weights == 0] = 1.0
+    ivi = (col("H_WEIGHT") * h + col("E_WEIGHT") * e + col("U_WEIGHT") * u) / weights
+    return ivi, _risk_codes(ivi, col("LOW_RISK_THRESHOLD"), col("MEDIUM_RISK_THRESHOLD"))
+
+
+def evaluate_scenarios(ivi_scores, scenarios, contract_scores=False, chunk_size=CHUNK_SIZE):
+    """
+    Evaluate every scenario against every contract in ivi_scores.
+
+    Returns {"summary", "migrations"} (plus "contract_scores", a long
+    SCENARIO_ID x CONT_NO table, with contract_scores) as DataFrames.
+    """
+    components = {col: ivi_scores[col].to_numpy(dtype=float) for col in ("H_SCORE", "E_SCORE", "LOSS_RATIO")}
+    num_contracts = len(ivi_scores)
+    levels = len(RISK_LEVELS)
+
+    _, baseline = score_matrix(components, {name: [value] for name, value in BASELINE.items()})
+    baseline = baseline[0]
+
+    num_scenarios = len(scenarios)
+    avg_ivi = np.empty(num_scenarios)
+    migrations = np.empty((num_scenarios, levels, levels), dtype=np.int64)
+    blocks = []
+
+    for start in range(0, num_scenarios, chunk_size):
+        block = scenarios.iloc[start:start + chunk_size]
+        ivi, risk = score_matrix(components, {name: block[name].to_numpy() for name in BASELINE})
+        avg_ivi[start:start + len(block)] = ivi.mean(axis=1) if num_contracts else np.nan
+
+        # (scenario, from, to) cell index per contract -> counts in one pass
+        cells = (np.arange(len(block))[:, None] * levels + baseline[None, :]) * levels + risk
+        migrations[start:start + len(block)] = np.bincount(
+            cells.ravel(), minlength=len(block) * levels * levels).reshape(len(block), levels, levels)
+
+        if contract_scores:
+            blocks.append(pd.DataFrame({
+                "SCENARIO_ID": np.repeat(block["SCENARIO_ID"].to_numpy(), num_contracts),
+                "CONT_NO": np.tile(ivi_scores["CONT_NO"].to_numpy(), len(block)),
+                "IVI_SCORE": np.round(ivi.ravel(), 2),
+                "RISK_CATEGORY": pd.Categorical.from_codes(risk.ravel(), categories=RISK_LEVELS),
+            }))
+
+    counts = migrations.sum(axis=1)  # contracts per scenario risk level
+    upgraded = np.triu(np.ones((levels, levels), dtype=bool), k=1)
+    summary = scenarios.copy()
+    summary["AVG_IVI_SCORE"] = np.round(avg_ivi, 2)
+    for code, level in enumerate(RISK_LEVELS):
+        summary[f"{level.upper()}_RISK"] = counts[:, code]
+    summary["UPGRADED"] = migrations[:, upgraded].sum(axis=1)
+    summary["DOWNGRADED"] = migrations[:, upgraded.T].sum(axis=1)
+    summary["CHANGED"] = summary["UPGRADED"] + summary["DOWNGRADED"]
+
+    from_level, to_level = np.meshgrid(np.arange(levels), np.arange(levels), indexing="ij")
+    migration_table = pd.DataFrame({
+        "SCENARIO_ID": np.repeat(scenarios["SCENARIO_ID"].to_numpy(), levels * levels),
+        "FROM_RISK": pd.Categorical.from_codes(np.tile(from_level.ravel(), num_scenarios), categories=RISK_LEVELS),
+        "TO_RISK": pd.Categorical.from_codes(np.tile(to_level.ravel(), num_scenarios), categories=RISK_LEVELS),
+        "CONTRACTS": migrations.ravel(),
+    })
+
+    result = {"summary": summary, "migrations": migration_table}
+    if contract_scores:
+        result["contract_scores"] = pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame()
+    return result
+
+
+def benchmark(num_contracts=300, num_scenarios=(1000, 10000, 100000), repeat=3):
+    """Time evaluate_scenarios on random component scores"""
+    rng = np.random.default_rng(42)
+    ivi_scores = pd.DataFrame({
+        "CONT_NO": [f"CONT2024{i + 1:04d}" for i in range(num_contracts)],
+        "H_SCORE": rng.uniform(0, 100, num_contracts),
+        "E_SCORE": rng.uniform(0, 100, num_contracts),
+        "LOSS_RATIO": rng.uniform(30, 150, num_contracts),
+    })
+    print(f"IVI scenario benchmark ({num_contracts} contracts, best of {repeat})")
+    print(f"{'scenarios':>10} {'seconds':>9} {'us/scenario':>12}")
+    for size in num_scenarios:
+        scenarios = scenario_frame(pd.DataFrame({
+            "H_WEIGHT": rng.uniform(0.2, 0.5, size),
+            "E_WEIGHT": rng.uniform(0.2, 0.5, size),
+            "U_WEIGHT": rng.uniform(0.2, 0.5, size),
+            "TARGET_LOSS_RATIO": rng.uniform(50, 90, size),
+            "LOW_RISK_THRESHOLD": rng.uniform(60, 80, size),
+            "MEDIUM_RISK_THRESHOLD": rng.uniform(40, 60, size),
+        }))
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            evaluate_scenarios(ivi_scores, scenarios)
+            best = min(best, time.perf_counter() - start)
+        print(f"{size:>10,} {best:>9.3f} {best / size * 1e6:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate IVI weight / threshold scenarios")
+    parser.add_argument("--data-dir", default="data", help="Directory with ivi_scores (default: data)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--grid", help="JSON grid of parameter value lists (default: a built-in grid)")
+    source.add_argument("--scenarios", help="CSV or JSON list of scenarios")
+    parser.add_argument("--output-dir", default=None, help="Where to write the results (default: --data-dir)")
+    parser.add_argument("--contract-scores", action="store_true",
+                        help="Also write every contract's score under every scenario")
+    parser.add_argument("--benchmark", action="store_true", help="Time random scenarios for 300 contracts")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    if args.scenarios or args.grid:
+        scenarios = load_scenarios(args.scenarios or args.grid)
+    else:
+        scenarios = expand_grid(DEFAULT_GRID)
+    ivi_scores = read_table("ivi_scores", args.data_dir, columns=["CONT_NO", "H_SCORE", "E_SCORE", "LOSS_RATIO"])
+
+    start = time.perf_counter()
+    result = evaluate_scenarios(ivi_scores, scenarios, contract_scores=args.contract_scores)
+    print(f"Evaluated {len(scenarios):,} scenarios x {len(ivi_scores)} contracts "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    output_dir = args.output_dir or args.data_dir
+    os.makedirs(output_dir, exist_ok=True)
+    for name, df in result.items():
+        path = os.path.join(output_dir, f"scenario_{name}.csv")
+        df.to_csv(path, index=False)
+        print(f"✓ Saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
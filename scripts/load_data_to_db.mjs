@@ -1,7 +1,7 @@
 import mysql from 'mysql2/promise';
-import fs from 'fs';
 import path from 'path';
 import { fileURLToPath } from 'url';
+import { loadJson } from './columnar_json.mjs';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -19,8 +19,14 @@ async function main() {
   const connection = await mysql.createConnection(process.env.DATABASE_URL);
   
   console.log('Loading seed data...');
-  const seedDataPath = path.join(__dirname, '../client/public/data/seed_data.json');
-  const seedData = JSON.parse(fs.readFileSync(seedDataPath, 'utf-8'));
+  // Newest of the compact columnar seed (see columnar_json.py) and the records JSON; columnar on a tie
+  const dataDir = path.join(__dirname, '../client/public/data');
+  const { path: seedDataPath, data: seedData } = loadJson([
+    path.join(dataDir, 'seed_data.columnar.json.gz'),
+    path.join(dataDir, 'seed_data.columnar.json'),
+    path.join(dataDir, 'seed_data.json'),
+  ]);
+  console.log(`Read ${path.basename(seedDataPath)}`);
   
   console.log(`Found ${seedData.corporateClients.length} corporate clients`);
   console.log(`Found ${seedData.members.length} members`);
@@ -0,0 +1,377 @@
+"""
+Dependency-aware pipeline runner
+
+Models every pipeline artifact as a node: a build step with the files it
+reads (inputs) and the files it writes (outputs). A node's fingerprint is
+the SHA-256 over its parameters and the contents of its inputs (hashed by
+data_cache.content_hash, so an unchanged file costs one stat()), and a node
+runs only when that fingerprint differs from the one recorded at its last
+successful build or one of its outputs is missing. Nodes are ordered by
+which node produces which input, and downstream fingerprints use the
+upstream outputs' contents, so a rebuild that produces identical files
+stops there.
+
+The IVI graph (ivi_pipeline) covers the sample data run
+(generate_sample_data.py: members, claims, ..., ivi_scores), one node per
+Power BI sheet or sheet group (risk_distribution, client_analysis,
+provider_analysis, ...), data_model.json, the implementation guide and the
+workbook. Sheet nodes keep their frames as pickles in
+<output-dir>/.pipeline, which the xlsx node assembles, so after only
+recommendations.csv changes just the recommendations, client_analysis and
+xlsx nodes run. The script files themselves are inputs too (the entry
+script and every local module it imports), so a code change rebuilds what
+it affects.
+
+Usage:
+    # Generate (when the generator options or provider master changed) and refresh the Power BI files
+    python scripts/pipeline_dag.py --generate --data-dir data --output-dir powerbi --providers synthetic \\
+        --members 100000 --seed 7
+    # Data from ingest_extracts.py or an earlier run: Power BI nodes only
+    python scripts/pipeline_dag.py --data-dir data --output-dir powerbi --providers Provider_Info.xlsx
+    python scripts/pipeline_dag.py --data-dir data --output-dir powerbi --target client_analysis --dry-run
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+import pandas as pd
+
+import create_powerbi_files as powerbi
+from data_cache import content_hash
+from excel_export import write_workbook
+from pipeline_io import parquet_path
+from run_report import RunReport
+from synthetic_providers import SYNTHETIC
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STAGE_DIR = ".pipeline"
+STATE_FILE = "state.json"
+
+# Tables generate_sample_data.py always writes (CSV), and those it skips when the history is too short
+GENERATED_TABLES = ["corporate_clients", "members", "claims", "preauthorizations", "calls", "providers",
+                    "ivi_scores", "ivi_period_scores"]
+PREDICTION_TABLES = ["future_predictions", "feature_importance"]
+
+
+def local_imports(script):
+    """`script` and every module next to it that it imports, directly or through another one (sorted)"""
+    seen, pending = set(), [script]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        with open(os.path.join(SCRIPT_DIR, name)) as f:
+            tree = ast.parse(f.read(), filename=name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules = [node.module]
+            else:
+                continue
+            pending += [f"{module}.py" for module in modules if os.path.exists(os.path.join(SCRIPT_DIR, f"{module}.py"))]
+    return sorted(seen)
+
+
+# Scripts whose code determines each group of outputs
+GENERATOR_CODE = local_imports("generate_sample_data.py")
+POWERBI_CODE = local_imports("create_powerbi_files.py")
+
+
+# Power BI sheet nodes: (node, input tables, sheets, builder); builder(*tables) returns the
+# sheet frame, or a tuple of frames for several sheets; None passes the table through
+SHEET_NODES = [
+    ("summary", ["ivi_scores", "future_predictions"], ["Summary"], powerbi.summary_sheet),
+    ("ivi_scores", ["ivi_scores"], ["IVI_Scores"], None),
+    ("future_predictions", ["ivi_scores", "future_predictions"], ["Future_Predictions"],
+     powerbi.future_predictions_sheet),
+    ("recommendations", ["recommendations"], ["Recommendations"], None),
+    ("feature_importance", ["feature_importance"], ["Feature_Importance"], powerbi.feature_importance_sheet),
+    ("risk_distribution", ["ivi_scores"], ["Risk_Distribution"], powerbi.risk_distribution_sheet),
+    ("client_analysis", ["ivi_scores", "future_predictions", "recommendations"], ["Client_Analysis"],
+     powerbi.client_analysis_sheet),
+    ("provider_info", ["provider_info"], ["Provider_Info"], powerbi.provider_info_sheet),
+    ("provider_analysis", ["provider_info", "claims"], ["Provider_Analysis", "Provider_By_Region", "Provider_Performance"],
+     powerbi.provider_analysis_sheets),
+    ("preauth_analytics", ["preauthorizations"], powerbi.PREAUTH_SHEETS, powerbi.preauth_sheets),
+    ("dax_measures", [], ["DAX_Measures"], powerbi.dax_measures_sheet),
+]
+
+# Workbook sheets in build_powerbi_tables() order
+WORKBOOK_SHEETS = ["Summary", "IVI_Scores", "Future_Predictions", "Recommendations", "Feature_Importance",
+                   "Risk_Distribution", "Client_Analysis", "Provider_Info", "Provider_Analysis",
+                   "Provider_By_Region", "Provider_Performance", *powerbi.PREAUTH_SHEETS, "DAX_Measures"]
+
+# Tables data_model.json describes
+MODEL_TABLES = ["ivi_scores", "future_predictions", "recommendations", "feature_importance", "provider_info"]
+
+
+class Node:
+    """
+    A build step: build() reads the `inputs` files and writes the `outputs`
+    files, and possibly the `optional_outputs` (files it writes only under
+    some options or data, e.g. Parquet copies).
+    """
+
+    def __init__(self, name, build, inputs=(), outputs=(), params=None, optional_outputs=()):
+        self.name = name
+        self.build = build
+        self.inputs = [os.path.abspath(path) for path in inputs]
+        self.outputs = [os.path.abspath(path) for path in outputs]
+        self.optional_outputs = [os.path.abspath(path) for path in optional_outputs]
+        self.params = params or {}
+
+
+def file_fingerprint(path):
+    """Content hash of a file or directory; None when it does not exist"""
+    return content_hash(path) if os.path.exists(path) else None
+
+
+class Pipeline:
+    def __init__(self, nodes, state_path):
+        self.nodes = {}
+        self.producers = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Duplicate pipeline node: {node.name}")
+            self.nodes[node.name] = node
+            for path in node.outputs + node.optional_outputs:
+                if path in self.producers:
+                    raise ValueError(f"{path} is written by both {self.producers[path]} and {node.name}")
+                self.producers[path] = node.name
+        self.state_path = state_path
+
+    def dependencies(self, name):
+        """Nodes producing the inputs of `name`"""
+        return sorted({self.producers[path] for path in self.nodes[name].inputs if path in self.producers})
+
+    def order(self, targets=None):
+        """`targets` (default: every node) and everything upstream of them, dependencies first"""
+        unknown = [name for name in targets or [] if name not in self.nodes]
+        if unknown:
+            raise ValueError(f"Unknown pipeline nodes: {', '.join(unknown)} (expected {', '.join(self.nodes)})")
+
+        ordered, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline cycle through {name}")
+            visiting.add(name)
+            for dep in self.dependencies(name):
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            ordered.append(name)
+
+        for name in targets or self.nodes:
+            visit(name)
+        return ordered
+
+    def fingerprint(self, node):
+        payload = {
+            "params": node.params,
+            "inputs": [[path, file_fingerprint(path)] for path in node.inputs],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def load_state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self, state):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def is_fresh(self, name, fingerprint, state):
+        return (state.get(name, {}).get("fingerprint") == fingerprint
+                and all(os.path.exists(path) for path in self.nodes[name].outputs))
+
+    def run(self, targets=None, force=False, dry_run=False, report=None):
+        """
+        Build the stale nodes among `targets` and their upstream nodes.
+        Returns {node: "built" | "skipped"}, or "stale" instead of "built"
+        with dry_run (nothing is run).
+        """
+        report = report or RunReport("pipeline_dag")
+        state = self.load_state()
+        statuses = {}
+
+        for name in self.order(targets):
+            node = self.nodes[name]
+            if any(statuses[dep] == "stale" for dep in self.dependencies(name)):
+                statuses[name] = "stale"
+                continue
+
+            fingerprint = self.fingerprint(node)
+            if not force and self.is_fresh(name, fingerprint, state):
+                statuses[name] = "skipped"
+                continue
+            if dry_run:
+                statuses[name] = "stale"
+                continue
+
+            with report.stage(name):
+                node.build()
+            missing = [path for path in node.outputs if not os.path.exists(path)]
+            if missing:
+                raise RuntimeError(f"Node {name} did not write {', '.join(missing)}")
+
+            state[name] = {"fingerprint": fingerprint, "built_at": datetime.now().isoformat()}
+            self.save_state(state)
+            statuses[name] = "built"
+        return statuses
+
+
+def table_sources(name, data_dir, providers_path):
+    """Files a create_powerbi_files input table may be read from (CSV and Parquet copy)"""
+    if name == "provider_info" and providers_path != SYNTHETIC:
+        return [providers_path]
+    table = "providers" if name == "provider_info" else name
+    return [os.path.join(data_dir, f"{table}.csv"), parquet_path(data_dir, table)]
+
+
+def sheet_path(output_dir, sheet):
+    return os.path.join(output_dir, STAGE_DIR, f"{sheet}.pkl")
+
+
+def _save_sheet(df, path):
+    df.to_pickle(f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+
+
+def _code(files):
+    return [os.path.join(SCRIPT_DIR, name) for name in files]
+
+
+def generate_node(data_dir, providers_path, generate_args):
+    """generate_sample_data.py run writing GENERATED_TABLES into data_dir"""
+    argv = ["--excel", "none", *generate_args, "--output-dir", data_dir, "--providers", providers_path]
+    inputs = _code(GENERATOR_CODE)
+    if providers_path != SYNTHETIC:
+        inputs.append(providers_path)
+    for i, arg in enumerate(generate_args):
+        if arg == "--config" and i + 1 < len(generate_args):
+            inputs.append(generate_args[i + 1])
+        elif arg.startswith("--config="):
+            inputs.append(arg.split("=", 1)[1])
+
+    def build():
+        import generate_sample_data
+        generate_sample_data.main(argv)
+
+    return Node("sample_data", build, inputs=inputs,
+                outputs=[os.path.join(data_dir, f"{table}.csv") for table in GENERATED_TABLES],
+                optional_outputs=[os.path.join(data_dir, f"{table}.csv") for table in PREDICTION_TABLES]
+                + [parquet_path(data_dir, table) for table in GENERATED_TABLES + PREDICTION_TABLES],
+                params={"argv": argv})
+
+
+def sheet_node(name, tables, sheets, builder, data_dir, output_dir, providers_path):
+    def build():
+        frames = [powerbi.load_input(table, data_dir, providers_path) for table in tables]
+        result = builder(*frames) if builder else frames[0]
+        results = result if isinstance(result, tuple) else (result,)
+        os.makedirs(os.path.join(output_dir, STAGE_DIR), exist_ok=True)
+        for sheet, df in zip(sheets, results):
+            _save_sheet(df, sheet_path(output_dir, sheet))
+        powerbi.write_csv_exports(dict(zip(sheets, results)), output_dir)
+
+    outputs = [sheet_path(output_dir, sheet) for sheet in sheets]
+    outputs += [os.path.join(output_dir, powerbi.CSV_EXPORTS[sheet]) for sheet in sheets if sheet in powerbi.CSV_EXPORTS]
+    inputs = [path for table in tables for path in table_sources(table, data_dir, providers_path)]
+    return Node(name, build, inputs=inputs + _code(POWERBI_CODE), outputs=outputs)
+
+
+def powerbi_nodes(data_dir, output_dir, providers_path, public_copy=None):
+    """Sheet, data model, guide and workbook nodes for create_powerbi_files.py's outputs"""
+    nodes = [sheet_node(*spec, data_dir, output_dir, providers_path) for spec in SHEET_NODES]
+
+    def build_data_model():
+        inputs = {name: powerbi.load_input(name, data_dir, providers_path) for name in MODEL_TABLES}
+        inputs["provider_info"] = powerbi.provider_info_sheet(inputs["provider_info"])
+        powerbi.write_data_model(powerbi.data_model_schema(**inputs), output_dir)
+
+    nodes.append(Node("data_model", build_data_model,
+                      inputs=[path for name in MODEL_TABLES
+                              for path in table_sources(name, data_dir, providers_path)] + _code(POWERBI_CODE),
+                      outputs=[os.path.join(output_dir, "data_model.json")]))
+
+    nodes.append(Node("guide", lambda: powerbi.write_guide(output_dir), inputs=_code(POWERBI_CODE),
+                      outputs=[os.path.join(output_dir, "PowerBI_Implementation_Guide.md")]))
+
+    workbook = os.path.join(output_dir, "IVI_PowerBI_Data.xlsx")
+
+    def build_workbook():
+        write_workbook(workbook, {sheet: pd.read_pickle(sheet_path(output_dir, sheet)) for sheet in WORKBOOK_SHEETS})
+        if public_copy:
+            shutil.copy(workbook, public_copy)
+
+    nodes.append(Node("xlsx", build_workbook,
+                      inputs=[sheet_path(output_dir, sheet) for sheet in WORKBOOK_SHEETS] + _code(POWERBI_CODE),
+                      outputs=[workbook], params={"public_copy": public_copy}))
+    return nodes
+
+
+def ivi_pipeline(data_dir, output_dir, providers_path=powerbi.PROVIDERS_PATH, generate_args=None, public_copy=None):
+    """
+    The IVI pipeline; with generate_args (a generate_sample_data.py argument
+    list, possibly empty) the data tables are a node of it, otherwise they
+    are plain inputs.
+    """
+    nodes = []
+    if generate_args is not None:
+        nodes.append(generate_node(data_dir, providers_path, generate_args))
+    nodes += powerbi_nodes(data_dir, output_dir, providers_path, public_copy)
+    return Pipeline(nodes, os.path.join(output_dir, STAGE_DIR, STATE_FILE))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the stale IVI pipeline outputs; options not listed here go to generate_sample_data.py")
+    parser.add_argument("--data-dir", default=powerbi.DATA_DIR, help="Directory with the IVI data tables")
+    parser.add_argument("--output-dir", default=powerbi.OUTPUT_DIR, help="Directory for the Power BI files")
+    parser.add_argument("--providers", default=powerbi.PROVIDERS_PATH,
+                        help=f"Provider master Excel file, or '{SYNTHETIC}'")
+    parser.add_argument("--generate", action="store_true",
+                        help="Include the generate_sample_data.py run (with the remaining options) as a node")
+    parser.add_argument("--public-copy", default=None, help="Extra copy of the workbook for the web app")
+    parser.add_argument("--target", action="append", default=[],
+                        help="Node to bring up to date, with its upstream nodes (default: all); repeatable")
+    parser.add_argument("--force", action="store_true", help="Rebuild the selected nodes even when unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="List the nodes that would be rebuilt")
+    parser.add_argument("--report", default=None, help="Write the per-node timing report to this JSON file")
+    args, generate_args = parser.parse_known_args()
+    if generate_args and not args.generate:
+        parser.error(f"unrecognized arguments: {' '.join(generate_args)} (generator options need --generate)")
+
+    pipeline = ivi_pipeline(args.data_dir, args.output_dir, args.providers,
+                            generate_args if args.generate else None, args.public_copy)
+    report = RunReport("pipeline_dag", vars(args))
+    statuses = pipeline.run(args.target or None, force=args.force, dry_run=args.dry_run, report=report)
+
+    for name, status in statuses.items():
+        print(f"  {'✓' if status == 'built' else '·' if status == 'skipped' else '!'} {name}: {status}")
+    changed = sum(status != "skipped" for status in statuses.values())
+    print(f"{changed} of {len(statuses)} nodes {'stale' if args.dry_run else 'rebuilt'}")
+    if changed and not args.dry_run:
+        report.print_summary()
+    if args.report:
+        report.save(args.report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Typed table I/O for the IVI data pipeline
+
+Defines the column types of every generated table (categoricals for
+low-cardinality text, datetime64 for dates) and reads / writes them as
+Parquet datasets. Large fact tables are partitioned by month of their main
+date column or by contract, so Power BI refreshes and the scripts can load
+only what they need.
+
+read_table() prefers the Parquet copy when one exists and falls back to the
+CSV, applying the same types, so callers don't care which format is on disk.
+ChunkedTableWriter appends a table chunk by chunk for the streaming mode.
+
+Parquet support needs pyarrow (pip install pyarrow); without it the CSV /
+JSON outputs keep working and PARQUET_AVAILABLE is False.
+"""
+
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+PARQUET_DIR = "parquet"
+PARTITION_COLUMN = "PARTITION"
+PARTITION_MODES = ["month", "contract", "none"]
+
+# Integer surrogate keys used in memory and their exported string form:
+# 1000 -> "MBR00001000" (prefix, zero-padded width)
+ID_FORMATS = {
+    "MBR_NO": ("MBR", 8),
+    "CLAIM_ID": ("CLM", 10),
+    "PREAUTH_ID": ("PA", 8),
+    "CALL_ID": ("CALL", 10),
+}
+
+# categories: low-cardinality text columns stored as pandas categoricals
+# dates: columns parsed to datetime64
+# numeric: narrower numeric types for columns whose range / precision allows it
+#          (money amounts with cents stay float64)
+# date_key: date column used for month partitioning (None = never partitioned)
+TABLE_SCHEMAS = {
+    "corporate_clients": {
+        "categories": ["SECTOR", "REGION", "NETWORK"],
+        "dates": ["CONTRACT_START", "CONTRACT_END"],
+        "date_key": None,
+    },
+    "members": {
+        "categories": ["CONT_NO", "COMPANY_NAME", "GENDER", "MARITAL_STATUS", "NATIONALITY", "CITY",
+                       "PLAN_NETWORK", "CHRONIC_CONDITIONS", "STATUS"],
+        "dates": ["ENROLLMENT_DATE"],
+        "numeric": {"AGE": "int8"},
+        "date_key": "ENROLLMENT_DATE",
+    },
+    "claims": {
+        "categories": ["CONT_NO", "COMPANY_NAME", "PROV_NAME", "PROVIDER_PRACTICE", "PROVIDER_REGION", "ICD_CODE",
+                       "DIAGNOSIS", "BENEFIT_CODE", "BENEFIT_DESC", "STATUS", "REJECTION_REASON"],
+        "dates": ["CLAIM_DATE"],
+        "numeric": {"PROV_CODE": "int32", "CLAIMED_AMOUNT": "int32", "PROCESSING_DAYS": "int8"},
+        "date_key": "CLAIM_DATE",
+    },
+    "preauthorizations": {
+        "categories": ["CONT_NO", "COMPANY_NAME", "PROV_NAME", "MEDICATION_NAME", "MEDICATION_CATEGORY",
+                       "DOCS_SUBMITTED", "STATUS", "REJECTION_REASON"],
+        "dates": ["REQUEST_DATE", "DECISION_DATE"],
+        "numeric": {"PROV_CODE": "int32", "ESTIMATED_COST": "int32"},
+        "date_key": "REQUEST_DATE",
+    },
+    "calls": {
+        "categories": ["CONT_NO", "COMPANY_NAME", "CALL_CAT", "CALL_TYPE", "CALL_REASON", "STATUS"],
+        "dates": ["CRT_DATE", "UPD_DATE"],
+        "numeric": {"RESOLUTION_TIME_HOURS": "float32", "SATISFACTION_SCORE": "float32"},
+        "date_key": "CRT_DATE",
+    },
+    "providers": {
+        "categories": ["PROVIDER_NETWORK", "PROVIDER_PRACTICE", "PROVIDER_REGION", "PROVIDER_TOWN"],
+        "dates": [],
+        "date_key": None,
+    },
+    "ivi_scores": {
+        "categories": ["SECTOR", "REGION", "RISK_CATEGORY"],
+        "dates": [],
+        "date_key": None,
+    },
+    "ivi_period_scores": {
+        "categories": ["PERIOD_TYPE", "RISK_CATEGORY"],
+        "dates": ["PERIOD_START", "PERIOD_END"],
+        "date_key": None,
+    },
+}
+
+
+def apply_dtypes(df, table):
+    """Cast a frame to the declared types of `table` (unknown tables pass through)"""
+    schema = TABLE_SCHEMAS.get(table)
+    if schema is None:
+        return df
+
+    df = df.copy(deep=False)
+    for col in schema["dates"]:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    for col in schema["categories"]:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    for col, dtype in schema.get("numeric", {}).items():
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]) and df[col].dtype != dtype:
+            # Float columns (real extracts: amounts with cents, missing values) are never cast to integers
+            if pd.api.types.is_float_dtype(df[col]) and np.issubdtype(np.dtype(dtype), np.integer):
+                continue
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def format_ids(prefix, start, count, width):
+    """Build sequential string IDs like CLM0000100000 for a whole block at once"""
+    return format_id_values(prefix, np.arange(start, start + count), width)
+
+
+def format_id_values(prefix, numbers, width):
+    """String IDs for an array of integer keys"""
+    return (prefix + pd.Series(numbers).astype(str).str.zfill(width)).to_numpy()
+
+
+def export_frame(df):
+    """
+    Frame as written to files: integer surrogate keys (ID_FORMATS) become
+    their string IDs. Other columns are shared with `df`, not copied.
+    """
+    ids = [col for col in ID_FORMATS if col in df.columns and pd.api.types.is_integer_dtype(df[col])]
+    if not ids:
+        return df
+    df = df.copy(deep=False)
+    for col in ids:
+        prefix, width = ID_FORMATS[col]
+        df[col] = format_id_values(prefix, df[col].to_numpy(), width)
+    return df
+
+
+def concat_tables(frames):
+    """
+    pd.concat that keeps categorical columns categorical when the frames
+    have different categories (plain concat falls back to strings).
+    """
+    frames = list(frames)
+    columns = list(frames[0].columns)
+    categorical = [col for col in columns if all(isinstance(df[col].dtype, pd.CategoricalDtype) for df in frames)]
+
+    combined = pd.concat([df.drop(columns=categorical) for df in frames], ignore_index=True)
+    for col in categorical:
+        combined[col] = union_categoricals([df[col] for df in frames])
+    return combined[columns]
+
+
+def parquet_path(output_dir, table):
+    """Dataset directory for partitioned tables, single file otherwise"""
+    base = os.path.join(output_dir, PARQUET_DIR, table)
+    return base if os.path.isdir(base) else f"{base}.parquet"
+
+
+def _partition_key(df, table, partition_by):
+    schema = TABLE_SCHEMAS.get(table, {})
+    if partition_by == "month" and schema.get("date_key"):
+        return df[schema["date_key"]].dt.strftime("%Y-%m").fillna("unknown")
+    if partition_by == "contract" and "CONT_NO" in df.columns:
+        return df["CONT_NO"].astype(str)
+    return None
+
+
+def write_parquet(df, table, output_dir, partition_by="month"):
+    """
+    Write a table under <output_dir>/parquet/ with its declared dtypes.
+
+    Partitioned tables become a hive-style dataset directory
+    (claims/PARTITION=2024-03/...), everything else a single file.
+    Returns the path written.
+    """
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+
+    df = apply_dtypes(export_frame(df), table)
+    base = os.path.join(output_dir, PARQUET_DIR, table)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+
+    # Remove the previous copy in either layout so no stale partitions survive
+    if os.path.isdir(base):
+        shutil.rmtree(base)
+    if os.path.exists(f"{base}.parquet"):
+        os.remove(f"{base}.parquet")
+
+    key = _partition_key(df, table, partition_by)
+    if key is None:
+        df.to_parquet(f"{base}.parquet", index=False)
+        return f"{base}.parquet"
+
+    df.assign(**{PARTITION_COLUMN: key}).to_parquet(base, index=False, partition_cols=[PARTITION_COLUMN])
+    return base
+
+
+def read_table(table, data_dir, columns=None):
+    """
+    Load a pipeline table, preferring <data_dir>/parquet/<table> over
+    <data_dir>/<table>.csv. Types from TABLE_SCHEMAS are applied either way.
+    """
+    path = parquet_path(data_dir, table)
+    if PARQUET_AVAILABLE and os.path.exists(path):
+        df = pd.read_parquet(path, columns=columns)
+        if PARTITION_COLUMN in df.columns:
+            df = df.drop(columns=PARTITION_COLUMN)
+        return df
+
+    csv_path = os.path.join(data_dir, f"{table}.csv")
+    schema = TABLE_SCHEMAS.get(table, {"categories": [], "dates": []})
+    header = pd.read_csv(csv_path, nrows=0).columns
+    wanted = header if columns is None else [c for c in header if c in columns]
+
+    return pd.read_csv(
+        csv_path,
+        usecols=list(wanted),
+        parse_dates=[c for c in schema["dates"] if c in wanted],
+        dtype={c: "category" for c in schema["categories"] if c in wanted},
+    )
+
+
+def _arrow_schema(table, first_chunk):
+    """
+    Fix the Arrow schema for a chunked table from its first chunk.
+    Categoricals use int32 indices so chunks with more or fewer categories
+    (int8 vs int16 indices in pandas) still share one schema, and columns
+    that happened to be all-null in the first chunk fall back to strings.
+    """
+    import pyarrow as pa
+
+    categories = TABLE_SCHEMAS.get(table, {}).get("categories", [])
+    fields = []
+    for field in first_chunk.schema:
+        if pa.types.is_dictionary(field.type) or (field.type == pa.null() and field.name in categories):
+            field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+        elif field.type == pa.null():
+            field = field.with_type(pa.string())
+        fields.append(field)
+    return pa.schema(fields, metadata=first_chunk.schema.metadata)
+
+
+class ChunkedTableWriter:
+    """
+    Append chunks of one table to its CSV (and optionally Parquet) output as
+    they are produced, so the full table never has to be held in memory.
+
+    Partitioned Parquet tables get one file per chunk and partition;
+    unpartitioned ones are streamed into a single file. A table that gets no
+    rows is still written as a header-only CSV on close(), with `columns` or
+    those of the empty chunks it was given.
+    """
+
+    def __init__(self, table, output_dir, parquet=False, partition_by="month", columns=None):
+        self.table = table
+        self.output_dir = output_dir
+        self.csv_path = os.path.join(output_dir, f"{table}.csv")
+        self.parquet = parquet
+        self.partition_by = partition_by
+        self.rows = 0
+        self.chunks = 0
+        self._columns = list(columns) if columns is not None else None
+        self._schema = None
+        self._parquet_writer = None
+
+        if parquet:
+            if not PARQUET_AVAILABLE:
+                raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+            base = os.path.join(output_dir, PARQUET_DIR, table)
+            os.makedirs(os.path.dirname(base), exist_ok=True)
+            if os.path.isdir(base):
+                shutil.rmtree(base)
+            if os.path.exists(f"{base}.parquet"):
+                os.remove(f"{base}.parquet")
+            self._parquet_base = base
+
+    def write(self, df):
+        if len(df) == 0:
+            if self._columns is None:
+                self._columns = list(df.columns)
+            return
+
+        df = export_frame(df)
+        df.to_csv(self.csv_path, mode="w" if self.chunks == 0 else "a", header=self.chunks == 0, index=False)
+
+        if self.parquet:
+            self._write_parquet(apply_dtypes(df, self.table))
+
+        self.rows += len(df)
+        self.chunks += 1
+
+    def _write_parquet(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        key = _partition_key(df, self.table, self.partition_by)
+        if key is not None:
+            df = df.assign(**{PARTITION_COLUMN: key})
+
+        chunk = pa.Table.from_pandas(df, preserve_index=False)
+        if self._schema is None:
+            self._schema = _arrow_schema(self.table, chunk)
+        chunk = chunk.cast(self._schema)
+
+        if key is not None:
+            pq.write_to_dataset(
+                chunk,
+                root_path=self._parquet_base,
+                partition_cols=[PARTITION_COLUMN],
+                basename_template=f"chunk{self.chunks:05d}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            return
+
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(f"{self._parquet_base}.parquet", self._schema)
+        self._parquet_writer.write_table(chunk)
+
+    def close(self):
+        if self.chunks == 0:
+            pd.DataFrame(columns=self._columns or []).to_csv(self.csv_path, index=False)
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
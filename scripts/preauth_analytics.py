@@ -0,0 +1,311 @@
+"""
+Pre-authorization turnaround and document-completeness analytics
+
+Turns the pre-auth table (REQUEST_DATE, DECISION_DATE, DOCS_SUBMITTED,
+MEDICATION_NAME / _CATEGORY, STATUS) into the PreAuth_* Power BI sheets:
+
+- PreAuth_Turnaround: decision time (DECISION_DATE - REQUEST_DATE) overall,
+  per status and per medication category (mean, P50, P90, max)
+- PreAuth_Turnaround_Days: requests per turnaround day, with shares
+- PreAuth_Documents: submission share per document and the approval rate
+  with and without it
+- PreAuth_Missing_Docs: approval / rejection rates per combination of
+  missing documents
+- PreAuth_Medications: volume, approval rate, turnaround and cost per
+  medication
+- PreAuth_Backlog: pending requests per contract, their estimated cost and
+  age at the as-of date
+
+DOCS_SUBMITTED ("Medical Report, Lab Results") is parsed into a multi-hot
+boolean matrix (requests x documents) in one pass: each distinct
+combination string is split once and every request takes its
+combination's row by category code. The missing-document combination of
+each request is then one matrix product with the document bit values, so
+grouping by it is an integer groupby.
+
+Usage:
+    python scripts/preauth_analytics.py --data-dir data
+    python scripts/preauth_analytics.py --data-dir data --as-of 2025-01-01 \\
+        --documents "Medical Report,Lab Results,BMI Certificate,Prescription"
+    python scripts/preauth_analytics.py --benchmark
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from pipeline_io import read_table
+from provider_analytics import group_percentiles
+
+# Pre-auth columns the analytics read; missing ones are treated as empty
+INPUT_COLUMNS = ["CONT_NO", "COMPANY_NAME", "MEDICATION_NAME", "MEDICATION_CATEGORY", "ESTIMATED_COST",
+                 "REQUEST_DATE", "DOCS_SUBMITTED", "STATUS", "DECISION_DATE"]
+
+TURNAROUND_PERCENTILES = [0.5, 0.9]
+
+# Label of the missing-documents group of complete requests
+NONE_MISSING = "All submitted"
+
+SHEETS = ["PreAuth_Turnaround", "PreAuth_Turnaround_Days", "PreAuth_Documents", "PreAuth_Missing_Docs",
+          "PreAuth_Medications", "PreAuth_Backlog"]
+
+STATUS_COLUMNS = ["REQUESTS", "APPROVED", "REJECTED", "PENDING"]
+
+
+def docs_matrix(docs_submitted, documents=None):
+    """
+    Multi-hot DataFrame (one bool column per document) of the comma-separated
+    DOCS_SUBMITTED values. `documents` fixes the columns and their order
+    (default: every document seen, sorted); missing values submit nothing.
+    """
+    values = pd.Series(docs_submitted).astype("category")
+    combos = pd.Series(values.cat.categories.astype(str))
+    per_combo = combos.str.strip().str.replace(r"\s*,\s*", "|", regex=True).str.get_dummies(sep="|").astype(bool)
+    if documents is not None:
+        per_combo = per_combo.reindex(columns=documents, fill_value=False)
+
+    # Extra all-False row for missing values (code -1)
+    table = np.vstack([per_combo.to_numpy(dtype=bool), np.zeros((1, per_combo.shape[1]), dtype=bool)])
+    return pd.DataFrame(table[values.cat.codes.to_numpy()], columns=per_combo.columns, index=values.index)
+
+
+def missing_documents(matrix):
+    """(bit mask of the missing documents per request, {mask: 'Doc A, Doc B' or NONE_MISSING})"""
+    bits = np.left_shift(1, np.arange(matrix.shape[1], dtype=np.int64))
+    masks = (~matrix.to_numpy(dtype=bool)).astype(np.int64) @ bits
+    names = np.array(matrix.columns, dtype=object)
+    labels = {mask: ", ".join(names[(mask & bits) > 0]) or NONE_MISSING for mask in np.unique(masks)}
+    return masks, labels
+
+
+def turnaround_days(preauths):
+    """Days from request to decision; NaN while undecided"""
+    requested = pd.to_datetime(preauths["REQUEST_DATE"]).to_numpy(dtype="datetime64[D]")
+    decided = pd.to_datetime(preauths["DECISION_DATE"]).to_numpy(dtype="datetime64[D]")
+    days = decided - requested
+    return np.where(np.isnat(days), np.nan, days.astype(np.int64))
+
+
+def _status_table(flags, keys):
+    """STATUS_COLUMNS counts and approval / rejection rates per key"""
+    table = flags.groupby(keys, observed=True, sort=True)[STATUS_COLUMNS].sum()
+    table["APPROVAL_RATE"] = (table["APPROVED"] / table["REQUESTS"] * 100).round(2)
+    table["REJECTION_RATE"] = (table["REJECTED"] / table["REQUESTS"] * 100).round(2)
+    return table
+
+
+def turnaround_summary(flags):
+    """Turnaround statistics for all requests, per STATUS and per MEDICATION_CATEGORY"""
+    rows = []
+    days = flags["TURNAROUND_DAYS"].to_numpy(dtype=float)
+    for dimension in ("ALL", "STATUS", "MEDICATION_CATEGORY"):
+        if dimension == "ALL":
+            codes, values = np.zeros(len(flags), dtype=np.int64), np.array(["All"], dtype=object)
+        else:
+            codes, values = pd.factorize(flags[dimension], sort=True)
+            values = np.asarray(values, dtype=object)
+        keep = codes >= 0
+        decided = keep & ~np.isnan(days)
+        requests = np.bincount(codes[keep], minlength=len(values))
+        count = np.bincount(codes[decided], minlength=len(values))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(codes[decided], weights=days[decided], minlength=len(values)) / count
+        percentiles = group_percentiles(codes, days, len(values), TURNAROUND_PERCENTILES)
+        maximum = pd.Series(days[decided]).groupby(codes[decided]).max().reindex(range(len(values))).to_numpy()
+        part = pd.DataFrame({"DIMENSION": dimension, "VALUE": values, "REQUESTS": requests, "DECIDED": count,
+                             "AVG_DAYS": np.round(mean, 2), "MAX_DAYS": maximum})
+        for i, q in enumerate(TURNAROUND_PERCENTILES):
+            part.insert(5 + i, f"P{round(q * 100)}_DAYS", percentiles[:, i])
+        rows.append(part)
+    return pd.concat(rows, ignore_index=True)
+
+
+def turnaround_histogram(flags):
+    days = flags["TURNAROUND_DAYS"].dropna().astype(np.int64)
+    counts = days.value_counts().sort_index()
+    share = counts / max(len(days), 1) * 100
+    return pd.DataFrame({
+        "TURNAROUND_DAYS": counts.index.to_numpy(),
+        "REQUESTS": counts.to_numpy(),
+        "SHARE": share.round(2).to_numpy(),
+        "CUMULATIVE_SHARE": share.cumsum().round(2).to_numpy(),
+    })
+
+
+def document_summary(flags, matrix):
+    """Per document: submission share and approval rate with / without it (matrix products over all requests)"""
+    submitted = matrix.to_numpy(dtype=float)
+    approved = flags["APPROVED"].to_numpy(dtype=float)
+    with_doc = submitted.sum(axis=0)
+    without_doc = len(flags) - with_doc
+    approved_with = approved @ submitted
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame({
+            "DOCUMENT": matrix.columns,
+            "SUBMITTED": with_doc.astype(np.int64),
+            "SUBMITTED_SHARE": np.round(with_doc / max(len(flags), 1) * 100, 2),
+            "APPROVAL_RATE_WITH": np.round(approved_with / with_doc * 100, 2),
+            "APPROVAL_RATE_WITHOUT": np.round((approved.sum() - approved_with) / without_doc * 100, 2),
+        })
+
+
+def missing_docs_approval(flags, labels):
+    table = _status_table(flags, "MISSING_MASK").reset_index()
+    table.insert(0, "MISSING_DOCUMENTS", table["MISSING_MASK"].map(labels))
+    table.insert(1, "DOCS_MISSING", [bin(mask).count("1") for mask in table["MISSING_MASK"]])
+    return (table.drop(columns="MISSING_MASK")
+            .sort_values(["DOCS_MISSING", "REQUESTS"], ascending=[True, False], kind="stable")
+            .reset_index(drop=True))
+
+
+def medication_approval(flags):
+    keys = ["MEDICATION_NAME", "MEDICATION_CATEGORY"]
+    table = _status_table(flags, keys)
+    means = flags.groupby(keys, observed=True, sort=True)[["TURNAROUND_DAYS", "ESTIMATED_COST", "ALL_DOCS"]].mean()
+    table["AVG_TURNAROUND_DAYS"] = means["TURNAROUND_DAYS"].round(2)
+    table["AVG_ESTIMATED_COST"] = means["ESTIMATED_COST"].round(2)
+    table["ALL_DOCS_SHARE"] = (means["ALL_DOCS"] * 100).round(2)
+    return table.reset_index().sort_values("REQUESTS", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def pending_backlog(flags, as_of):
+    """Pending requests per contract, oldest first by age at `as_of`"""
+    age = (np.datetime64(as_of, "D") - flags["REQUEST_DATE"].to_numpy(dtype="datetime64[D]")).astype(float)
+    pending = flags["PENDING"].to_numpy(dtype=bool)
+    frame = pd.DataFrame({
+        "CONT_NO": flags["CONT_NO"],
+        "COMPANY_NAME": flags["COMPANY_NAME"],
+        "REQUESTS": flags["REQUESTS"],
+        "PENDING": flags["PENDING"],
+        "PENDING_COST": np.where(pending, flags["ESTIMATED_COST"].to_numpy(dtype=float), 0.0),
+        "PENDING_AGE": np.where(pending, age, np.nan),
+        "PENDING_SINCE": flags["REQUEST_DATE"].where(pending),
+    })
+    table = frame.groupby(["CONT_NO", "COMPANY_NAME"], observed=True, sort=True, dropna=False).agg(
+        REQUESTS=("REQUESTS", "sum"),
+        PENDING=("PENDING", "sum"),
+        PENDING_COST=("PENDING_COST", "sum"),
+        OLDEST_PENDING_DATE=("PENDING_SINCE", "min"),
+        MAX_AGE_DAYS=("PENDING_AGE", "max"),
+        AVG_AGE_DAYS=("PENDING_AGE", "mean"),
+    ).reset_index()
+    table.insert(4, "PENDING_SHARE", (table["PENDING"] / table["REQUESTS"] * 100).round(2))
+    table["AVG_AGE_DAYS"] = table["AVG_AGE_DAYS"].round(1)
+    return table.sort_values(["PENDING", "MAX_AGE_DAYS"], ascending=False, kind="stable").reset_index(drop=True)
+
+
+def preauth_analytics(preauths_df, documents=None, as_of=None):
+    """
+    {sheet name: DataFrame} for SHEETS. `documents` is the required document
+    list (default: every document seen); `as_of` dates the backlog ages
+    (default: the latest request or decision date in the data).
+    """
+    preauths = preauths_df.reindex(columns=INPUT_COLUMNS).reset_index(drop=True)
+    preauths["REQUEST_DATE"] = pd.to_datetime(preauths["REQUEST_DATE"])
+    matrix = docs_matrix(preauths["DOCS_SUBMITTED"], documents)
+    masks, labels = missing_documents(matrix)
+    status = preauths["STATUS"]
+
+    flags = pd.DataFrame({
+        "CONT_NO": preauths["CONT_NO"],
+        "COMPANY_NAME": preauths["COMPANY_NAME"],
+        "MEDICATION_NAME": preauths["MEDICATION_NAME"],
+        "MEDICATION_CATEGORY": preauths["MEDICATION_CATEGORY"],
+        "STATUS": status,
+        "REQUEST_DATE": preauths["REQUEST_DATE"],
+        "ESTIMATED_COST": pd.to_numeric(preauths["ESTIMATED_COST"], errors="coerce"),
+        "TURNAROUND_DAYS": turnaround_days(preauths),
+        "MISSING_MASK": masks,
+        "ALL_DOCS": masks == 0,
+        "REQUESTS": 1,
+        "APPROVED": (status == "Approved").to_numpy().astype(np.int64),
+        "REJECTED": (status == "Rejected").to_numpy().astype(np.int64),
+        "PENDING": (status == "Pending").to_numpy().astype(np.int64),
+    })
+
+    if as_of is None:
+        latest = pd.concat([preauths["REQUEST_DATE"], pd.to_datetime(preauths["DECISION_DATE"])]).max()
+        as_of = latest if pd.notna(latest) else pd.Timestamp.today()
+
+    return {
+        "PreAuth_Turnaround": turnaround_summary(flags),
+        "PreAuth_Turnaround_Days": turnaround_histogram(flags),
+        "PreAuth_Documents": document_summary(flags, matrix),
+        "PreAuth_Missing_Docs": missing_docs_approval(flags, labels),
+        "PreAuth_Medications": medication_approval(flags),
+        "PreAuth_Backlog": pending_backlog(flags, pd.Timestamp(as_of).to_datetime64()),
+    }
+
+
+def _synthetic_preauths(num_preauths, rng):
+    documents = np.array(["Medical Report", "Lab Results", "BMI Certificate", "Prescription"], dtype=object)
+    order = np.argsort(rng.random((num_preauths, len(documents))), axis=1)
+    num_docs = rng.integers(1, len(documents) + 1, size=num_preauths)
+    docs = pd.Series(documents[order[:, 0]])
+    for j in range(1, len(documents)):
+        docs = docs.where(num_docs <= j, docs + ", " + documents[order[:, j]])
+    request = np.datetime64("2024-01-01") + rng.integers(0, 366, size=num_preauths).astype("timedelta64[D]")
+    status = np.array(["Approved", "Rejected", "Pending"], dtype=object)[rng.choice(3, size=num_preauths,
+                                                                                     p=[0.6, 0.3, 0.1])]
+    decision = request + rng.integers(1, 8, size=num_preauths).astype("timedelta64[D]")
+    decision[status == "Pending"] = np.datetime64("NaT")
+    return pd.DataFrame({
+        "CONT_NO": rng.integers(0, 300, size=num_preauths).astype(str),
+        "COMPANY_NAME": "Company",
+        "MEDICATION_NAME": np.array(["Ozempic", "Humira", "Insulin Pump"])[rng.integers(0, 3, size=num_preauths)],
+        "MEDICATION_CATEGORY": "Category",
+        "ESTIMATED_COST": rng.integers(500, 25000, size=num_preauths),
+        "REQUEST_DATE": request,
+        "DOCS_SUBMITTED": docs.astype("category"),
+        "STATUS": status,
+        "DECISION_DATE": decision,
+    })
+
+
+def benchmark(sizes=(100000, 1000000, 3000000), repeat=3):
+    rng = np.random.default_rng(42)
+    print(f"Pre-auth analytics benchmark (best of {repeat})")
+    print(f"{'pre-auths':>10} {'seconds':>9} {'ns/row':>8}")
+    for num_preauths in sizes:
+        preauths = _synthetic_preauths(num_preauths, rng)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            preauth_analytics(preauths)
+            best = min(best, time.perf_counter() - start)
+        print(f"{num_preauths:>10,} {best:>9.3f} {best / num_preauths * 1e9:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-authorization turnaround, document and backlog analytics")
+    parser.add_argument("--data-dir", default="data", help="Directory with the preauthorizations table (default: data)")
+    parser.add_argument("--output-dir", default=None, help="Where to write the CSVs (default: --data-dir)")
+    parser.add_argument("--documents", default=None,
+                        help="Comma-separated required documents (default: every document seen in DOCS_SUBMITTED)")
+    parser.add_argument("--as-of", default=None, help="Date the backlog ages are measured at (default: latest date in the data)")
+    parser.add_argument("--benchmark", action="store_true", help="Time the analytics on synthetic pre-auths")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    preauths_df = read_table("preauthorizations", args.data_dir, columns=INPUT_COLUMNS)
+    documents = [doc.strip() for doc in args.documents.split(",")] if args.documents else None
+    start = time.perf_counter()
+    sheets = preauth_analytics(preauths_df, documents, args.as_of)
+    print(f"Analyzed {len(preauths_df):,} pre-authorizations in {time.perf_counter() - start:.2f}s")
+    print(sheets["PreAuth_Missing_Docs"].to_string(index=False))
+
+    output_dir = args.output_dir or args.data_dir
+    os.makedirs(output_dir, exist_ok=True)
+    for sheet, df in sheets.items():
+        path = os.path.join(output_dir, f"{sheet.lower()}.csv")
+        df.to_csv(path, index=False)
+        print(f"✓ Saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
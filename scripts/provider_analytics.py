@@ -0,0 +1,211 @@
+"""
+Provider network analytics over claims volume
+
+Joins the claims to the provider master once (a hash lookup of every
+PROV_CODE in the master's index) and computes, per provider and per
+provider network:
+
+- claim count, distinct members, claimed and approved totals
+- rejection rate (% of claims with STATUS "Rejected")
+- average PROCESSING_DAYS
+- CLAIMED_AMOUNT percentiles (PERCENTILES)
+
+Sums and counts are np.bincount over the provider row of each claim, and
+the percentiles come from one sort by (group, amount) with the
+quantile positions computed from the group offsets: about half a
+microsecond per claim, so two million claims over 20,000 providers take
+about a second. The
+network's most common practice is one value_counts over the
+(network, practice) pairs instead of a Series.mode() per group.
+
+Usage:
+    python scripts/provider_analytics.py --data-dir data --providers Provider_Info.xlsx
+    python scripts/provider_analytics.py --data-dir data --providers synthetic --output-dir reports
+    python scripts/provider_analytics.py --benchmark
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from pipeline_io import read_table
+from synthetic_providers import SYNTHETIC, generate_providers, load_providers
+
+# Claim columns the analytics read
+INPUT_COLUMNS = ["MBR_NO", "PROV_CODE", "CLAIMED_AMOUNT", "APPROVED_AMOUNT", "STATUS", "PROCESSING_DAYS"]
+
+PERCENTILES = [0.5, 0.9, 0.99]
+PERCENTILE_COLUMNS = [f"CLAIMED_P{round(q * 100)}" for q in PERCENTILES]
+
+PROVIDER_COLUMNS = ["PROV_CODE", "PROV_NAME", "PROVIDER_NETWORK", "PROVIDER_PRACTICE", "PROVIDER_REGION"]
+
+METRIC_COLUMNS = ["CLAIMS", "MEMBERS", "TOTAL_CLAIMED", "TOTAL_APPROVED", "AVG_CLAIMED", "REJECTION_RATE",
+                  "AVG_PROCESSING_DAYS"] + PERCENTILE_COLUMNS
+
+
+def most_common(keys, values):
+    """
+    Most frequent value per key, ties going to the smallest value (what
+    Series.mode()[0] returns), from one value_counts over the pairs.
+    Returns a Series indexed by the sorted keys.
+    """
+    counts = (pd.DataFrame({"KEY": keys, "VALUE": values}).value_counts(sort=False)
+              .rename("COUNT").reset_index())
+    counts = counts.sort_values(["KEY", "COUNT", "VALUE"], ascending=[True, False, True], kind="stable")
+    return counts.drop_duplicates("KEY").set_index("KEY")["VALUE"].rename_axis(None)
+
+
+def group_percentiles(groups, values, num_groups, percentiles=PERCENTILES):
+    """
+    (num_groups, len(percentiles)) array of linearly interpolated percentiles
+    of `values` per group code (0..num_groups-1); NaN for empty groups.
+    """
+    keep = ~np.isnan(values) & (groups >= 0)
+    groups, values = groups[keep], values[keep]
+    # Sort by (group, value) as one int64 key of group and value rank: much faster than np.lexsort
+    rank = np.empty(len(values), dtype=np.int64)
+    rank[np.argsort(values)] = np.arange(len(values))
+    ordered = values[np.argsort(groups.astype(np.int64) * len(values) + rank)]
+    counts = np.bincount(groups, minlength=num_groups)
+    starts = np.cumsum(counts) - counts
+
+    result = np.full((num_groups, len(percentiles)), np.nan)
+    has = counts > 0
+    for i, q in enumerate(percentiles):
+        position = starts[has] + q * (counts[has] - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, starts[has] + counts[has] - 1)
+        fraction = position - low
+        result[has, i] = ordered[low] * (1 - fraction) + ordered[high] * fraction
+    return result
+
+
+def _metrics(groups, num_groups, claims):
+    """METRIC_COLUMNS per group code of each claim (-1 = left out)"""
+    valid = groups >= 0
+    g = groups[valid]
+    claimed = claims["CLAIMED_AMOUNT"].to_numpy(dtype=float)[valid]
+    approved = np.nan_to_num(claims["APPROVED_AMOUNT"].to_numpy(dtype=float)[valid])
+    rejected = (claims["STATUS"] == "Rejected").to_numpy()[valid]
+    days = claims["PROCESSING_DAYS"].to_numpy(dtype=float)[valid]
+    has_days = ~np.isnan(days)
+
+    count = np.bincount(g, minlength=num_groups)
+    member, member_names = pd.factorize(claims["MBR_NO"].to_numpy()[valid])
+    stride = np.int64(len(member_names) + 1)
+    # Distinct (group, member) pairs; member -1 (missing MBR_NO) shifted to 0
+    members = np.bincount(pd.unique(g * stride + member + 1) // stride, minlength=num_groups)
+    total_claimed = np.bincount(g, weights=np.nan_to_num(claimed), minlength=num_groups)
+    days_count = np.bincount(g[has_days], minlength=num_groups)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        metrics = {
+            "CLAIMS": count,
+            "MEMBERS": members,
+            "TOTAL_CLAIMED": total_claimed,
+            "TOTAL_APPROVED": np.bincount(g, weights=approved, minlength=num_groups),
+            "AVG_CLAIMED": total_claimed / count,
+            "REJECTION_RATE": np.round(np.bincount(g, weights=rejected, minlength=num_groups) / count * 100, 2),
+            "AVG_PROCESSING_DAYS": np.bincount(g[has_days], weights=days[has_days], minlength=num_groups) / days_count,
+        }
+    percentiles = group_percentiles(g, claimed, num_groups)
+    for i, column in enumerate(PERCENTILE_COLUMNS):
+        metrics[column] = percentiles[:, i]
+    return pd.DataFrame(metrics)
+
+
+def provider_analytics(claims_df, providers_df):
+    """
+    (per-provider, per-network) DataFrames. Every provider in the master
+    gets a row (zero claims when it has none); claims whose PROV_CODE is not
+    in the master are left out of both. A PROV_CODE repeated in the master
+    keeps its first row.
+    """
+    providers = providers_df.reset_index(drop=True)
+    repeated = providers["PROV_CODE"].duplicated().to_numpy()
+    if repeated.any():
+        print(f"Ignoring {int(repeated.sum()):,} provider master rows with a repeated PROV_CODE (first row kept)")
+        providers = providers[~repeated].reset_index(drop=True)
+    provider_row = pd.Index(providers["PROV_CODE"]).get_indexer(claims_df["PROV_CODE"])
+
+    by_provider = providers[[c for c in PROVIDER_COLUMNS if c in providers.columns]].copy()
+    by_provider[METRIC_COLUMNS] = _metrics(provider_row, len(providers), claims_df)
+
+    # Providers without a network (code -1) only appear in the per-provider table
+    network, networks = pd.factorize(providers["PROVIDER_NETWORK"], sort=True)
+    claim_network = np.where(provider_row >= 0, network[provider_row], -1)
+    in_network = network >= 0
+    by_network = pd.DataFrame({
+        "PROVIDER_NETWORK": np.asarray(networks, dtype=object),
+        "PROVIDERS": np.bincount(network[in_network], minlength=len(networks)),
+        "ACTIVE_PROVIDERS": np.bincount(network[in_network], weights=by_provider["CLAIMS"].to_numpy()[in_network] > 0,
+                                        minlength=len(networks)).astype(np.int64),
+        "MOST_COMMON_PRACTICE": most_common(network[in_network], providers["PROVIDER_PRACTICE"][in_network]).reindex(
+            range(len(networks)), fill_value="Unknown").to_numpy(),
+    })
+    by_network[METRIC_COLUMNS] = _metrics(claim_network, len(networks), claims_df)
+    total = by_network["TOTAL_CLAIMED"].sum()
+    by_network["SPEND_SHARE"] = np.round(by_network["TOTAL_CLAIMED"] / total * 100, 2) if total else 0.0
+    return by_provider, by_network
+
+
+def _synthetic_claims(num_claims, providers, rng):
+    claimed = rng.lognormal(7, 1.2, size=num_claims).round()
+    return pd.DataFrame({
+        "MBR_NO": rng.integers(0, max(num_claims // 4, 1), size=num_claims),
+        "PROV_CODE": providers["PROV_CODE"].to_numpy()[rng.integers(0, len(providers), size=num_claims)],
+        "CLAIMED_AMOUNT": claimed,
+        "APPROVED_AMOUNT": claimed * rng.uniform(0, 1, size=num_claims),
+        "STATUS": np.array(["Approved", "Rejected", "Pending"])[rng.choice(3, size=num_claims, p=[0.8, 0.15, 0.05])],
+        "PROCESSING_DAYS": rng.integers(1, 30, size=num_claims).astype(float),
+    })
+
+
+def benchmark(sizes=((10000, 500000), (20000, 2000000), (50000, 5000000)), repeat=3):
+    rng = np.random.default_rng(42)
+    print(f"Provider analytics benchmark (best of {repeat})")
+    print(f"{'providers':>10} {'claims':>10} {'seconds':>9} {'ns/claim':>9}")
+    for num_providers, num_claims in sizes:
+        providers = generate_providers(num_providers)
+        claims = _synthetic_claims(num_claims, providers, rng)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            provider_analytics(claims, providers)
+            best = min(best, time.perf_counter() - start)
+        print(f"{num_providers:>10,} {num_claims:>10,} {best:>9.3f} {best / num_claims * 1e9:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Claims volume, spend and rejection analytics per provider and network")
+    parser.add_argument("--data-dir", default="data", help="Directory with the claims table (default: data)")
+    parser.add_argument("--providers", default=SYNTHETIC,
+                        help=f"Provider master Excel file, or '{SYNTHETIC}' for <data-dir>/providers (default)")
+    parser.add_argument("--output-dir", default=None, help="Where to write the CSVs (default: --data-dir)")
+    parser.add_argument("--benchmark", action="store_true", help="Time the analytics on synthetic claims")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    claims_df = read_table("claims", args.data_dir, columns=INPUT_COLUMNS)
+    providers_df = read_table("providers", args.data_dir) if args.providers == SYNTHETIC else load_providers(args.providers)
+    start = time.perf_counter()
+    by_provider, by_network = provider_analytics(claims_df, providers_df)
+    print(f"Analyzed {len(claims_df):,} claims over {len(providers_df):,} providers "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(by_network[["PROVIDER_NETWORK", "PROVIDERS", "CLAIMS", "TOTAL_CLAIMED", "REJECTION_RATE", "SPEND_SHARE"]]
+          .to_string(index=False))
+
+    output_dir = args.output_dir or args.data_dir
+    os.makedirs(output_dir, exist_ok=True)
+    for name, df in (("provider_performance", by_provider), ("network_performance", by_network)):
+        df.to_csv(os.path.join(output_dir, f"{name}.csv"), index=False)
+        print(f"✓ Saved: {os.path.join(output_dir, f'{name}.csv')}")
+
+
+if __name__ == "__main__":
+    main()
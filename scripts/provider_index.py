@@ -0,0 +1,98 @@
+"""
+Provider sampling index
+
+Holds the provider master as plain NumPy arrays, built once, together with
+the row indices of every provider network and region. Claims and
+pre-auths draw thousands of providers per call as index arrays instead of
+calling providers_df.sample(1) per row, optionally restricted to providers
+in the member's plan network and home region.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+PROVIDER_COLUMNS = ["PROV_CODE", "PROV_NAME", "PROVIDER_NETWORK", "PROVIDER_PRACTICE", "PROVIDER_REGION", "PROVIDER_TOWN"]
+
+# Member city -> provider region
+CITY_REGIONS = {
+    "Riyadh": "Central",
+    "Jeddah": "Western",
+    "Makkah": "Western",
+    "Madinah": "Western",
+    "Dammam": "Eastern",
+    "Khobar": "Eastern",
+}
+
+
+def network_code(network):
+    """Provider network label as used on plans: 'H. NW7' -> 'NW7'"""
+    return re.sub(r"^[A-Z]\.\s*", "", str(network)).strip()
+
+
+class ProviderIndex:
+    """Provider master as arrays plus row indices grouped by network and region"""
+
+    def __init__(self, providers_df):
+        self.size = len(providers_df)
+        self.columns = {col: providers_df[col].to_numpy() for col in PROVIDER_COLUMNS if col in providers_df.columns}
+
+        networks = np.array([network_code(n) for n in self.columns.get("PROVIDER_NETWORK", np.full(self.size, ""))])
+        regions = np.asarray(self.columns.get("PROVIDER_REGION", np.full(self.size, "")), dtype=str)
+        self.networks = networks
+        self.regions = regions
+
+        self.by_network = self._group(networks)
+        self.by_region = self._group(regions)
+        self._pools = {}
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def _group(keys):
+        order = np.argsort(keys, kind="stable")
+        unique, starts = np.unique(keys[order], return_index=True)
+        return dict(zip(unique, np.split(order, starts[1:])))
+
+    def pool(self, network=None, region=None):
+        """
+        Row indices of providers in `network` and `region`, widening to the
+        network alone and then to all providers when nothing matches.
+        """
+        key = (network, region)
+        if key not in self._pools:
+            everyone = np.arange(self.size)
+            in_network = self.by_network.get(network, everyone) if network is not None else everyone
+            pool = in_network
+            if region is not None:
+                pool = np.intersect1d(in_network, self.by_region.get(region, everyone), assume_unique=True)
+                if len(pool) == 0:
+                    pool = in_network
+            self._pools[key] = pool
+        return self._pools[key]
+
+    def sample(self, rng, size, networks=None, cities=None):
+        """
+        Draw `size` provider row indices. With `networks` (member PLAN_NETWORK
+        per row) and/or `cities` (member CITY per row) each row is drawn from
+        the matching pool; rows are grouped by pool so there is one vectorized
+        draw per distinct (network, region) pair.
+        """
+        if networks is None and cities is None:
+            return rng.integers(0, self.size, size=size)
+
+        keys = pd.DataFrame({
+            "network": None if networks is None else np.asarray(networks, dtype=object),
+            "region": None if cities is None else pd.Series(cities).map(CITY_REGIONS).to_numpy(dtype=object),
+        }, index=np.arange(size))
+
+        result = np.empty(size, dtype=np.int64)
+        for (network, region), rows in keys.groupby(["network", "region"], dropna=False, sort=True).indices.items():
+            pool = self.pool(None if pd.isna(network) else network, None if pd.isna(region) else region)
+            result[rows] = pool[rng.integers(0, len(pool), size=len(rows))]
+        return result
+
+    def take(self, idx, column):
+        """Values of one provider column for sampled row indices"""
+        return self.columns[column][idx]
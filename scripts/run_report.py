@@ -0,0 +1,159 @@
+"""
+Per-stage instrumentation for pipeline runs
+
+RunReport times named stages (provider load, each generated table, IVI
+scoring, every file write) and records wall time, CPU time, rows
+produced, rows/sec and the change in resident memory across the stage.
+Stages that run many times (once per contract) accumulate into one entry.
+The report is saved as JSON next to the outputs.
+
+With profiling enabled every stage is also run under its own cProfile
+profiler; save() dumps one .prof file per stage plus a text summary of
+the top functions by cumulative time.
+
+Stats recorded in a worker process travel back as plain dicts
+(RunReport.stages) and are folded into the parent report with merge().
+"""
+
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_TOP = 25
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (peak RSS where the current value is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    return peak_rss_mb() or 0.0
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class RunReport:
+    """Named stage timings for one run, optionally with a cProfile per stage"""
+
+    def __init__(self, command=None, options=None, profile=False):
+        self.command = command
+        self.options = options or {}
+        self.profile = profile
+        self.stages = {}
+        self.memory = {}
+        self._profilers = {}
+        self._started = time.perf_counter()
+        self._started_cpu = time.process_time()
+        self.started_at = datetime.now().isoformat()
+
+    def add(self, name, wall, cpu, rows=None, mem_delta=0.0, calls=1):
+        entry = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "rows": None, "calls": 0, "mem_delta_mb": 0.0})
+        entry["wall_s"] += wall
+        entry["cpu_s"] += cpu
+        entry["mem_delta_mb"] += mem_delta
+        entry["calls"] += calls
+        if rows is not None:
+            entry["rows"] = (entry["rows"] or 0) + rows
+
+    def merge(self, stages):
+        """Fold in the stages of another report (e.g. from a worker process)"""
+        for name, entry in stages.items():
+            self.add(name, entry["wall_s"], entry["cpu_s"], entry["rows"], entry["mem_delta_mb"], entry["calls"])
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Time the enclosed block as stage `name`. The yielded dict's "rows"
+        can be set inside the block when the row count is only known there.
+        """
+        record = {"rows": rows}
+        profiler = self._profilers.setdefault(name, cProfile.Profile()) if self.profile else None
+        mem_before = current_rss_mb()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self.add(name, time.perf_counter() - start, time.process_time() - cpu_start, record["rows"],
+                     current_rss_mb() - mem_before)
+
+    def to_dict(self):
+        stages = {}
+        for name, entry in self.stages.items():
+            entry = dict(entry)
+            entry["rows_per_s"] = round(entry["rows"] / entry["wall_s"]) if entry["rows"] and entry["wall_s"] > 0 else None
+            for key in ("wall_s", "cpu_s", "mem_delta_mb"):
+                entry[key] = round(entry[key], 4)
+            stages[name] = entry
+
+        peak = peak_rss_mb()
+        return {
+            "command": self.command,
+            "options": self.options,
+            "started_at": self.started_at,
+            "finished_at": datetime.now().isoformat(),
+            "wall_s": round(time.perf_counter() - self._started, 4),
+            "cpu_s": round(time.process_time() - self._started_cpu, 4),
+            "peak_rss_mb": round(peak, 1) if peak is not None else None,
+            "python": platform.python_version(),
+            "stages": stages,
+            **({"memory": self.memory} if self.memory else {}),
+        }
+
+    def save(self, path, profile_dir=None):
+        """Write the JSON report, plus per-stage profiles when profiling was on"""
+        report = self.to_dict()
+        if self.profile and self._profilers:
+            profile_dir = profile_dir or os.path.join(os.path.dirname(os.path.abspath(path)), "profile")
+            report["profiles"] = self.save_profiles(profile_dir)
+
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        return report
+
+    def save_profiles(self, profile_dir):
+        """Dump <stage>.prof and <stage>.txt (top functions) per profiled stage"""
+        os.makedirs(profile_dir, exist_ok=True)
+        written = {}
+        for name, profiler in self._profilers.items():
+            base = os.path.join(profile_dir, name.replace("/", "_").replace(":", "_"))
+            profiler.dump_stats(f"{base}.prof")
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            with open(f"{base}.txt", "w") as f:
+                f.write(text.getvalue())
+            written[name] = f"{base}.prof"
+        return written
+
+    def print_summary(self):
+        print(f"\n{'stage':<32} {'wall s':>8} {'cpu s':>8} {'rows':>11} {'rows/s':>11} {'mem MB':>8}")
+        for name, entry in self.to_dict()["stages"].items():
+            rows = f"{entry['rows']:,}" if entry["rows"] is not None else "-"
+            rate = f"{entry['rows_per_s']:,}" if entry["rows_per_s"] is not None else "-"
+            print(f"{name:<32} {entry['wall_s']:>8.3f} {entry['cpu_s']:>8.3f} {rows:>11} {rate:>11} "
+                  f"{entry['mem_delta_mb']:>+8.1f}")
@@ -1,6 +1,8 @@
 import fs from 'fs';
 import path from 'path';
+import zlib from 'zlib';
 import { fileURLToPath } from 'url';
+import { encodeTables } from './columnar_json.mjs';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -204,6 +206,13 @@ async function loadData() {
   const outputPath = path.join(__dirname, '..', 'client', 'public', 'data', 'seed_data.json');
   fs.writeFileSync(outputPath, JSON.stringify(output, null, 2));
   console.log(`\nSeed data saved to ${outputPath}`);
+
+  // Compact dictionary-encoded copy (plus gzip) for load_data_to_db.mjs, see columnar_json.py
+  const columnarPath = outputPath.replace(/\.json$/, '.columnar.json');
+  const columnar = Buffer.from(JSON.stringify(encodeTables(output)));
+  fs.writeFileSync(columnarPath, columnar);
+  fs.writeFileSync(`${columnarPath}.gz`, zlib.gzipSync(columnar, { level: 9 }));
+  console.log(`Columnar seed data saved to ${columnarPath}(.gz)`);
   console.log(`\nSummary:`);
   console.log(`- Corporate Clients: ${corporateClients.length}`);
   console.log(`- Members: ${output.members.length}`);
@@ -0,0 +1,144 @@
+"""
+Synthetic provider master
+
+Builds a provider table with the columns of Provider_Info(2).xlsx
+(PROV_CODE, PROV_NAME, PROVIDER_NETWORK, PROVIDER_PRACTICE,
+PROVIDER_REGION, PROVIDER_TOWN) so the pipeline can run without the
+external workbook. The network, practice, region and town mixes follow
+the real master: most providers sit in the open network, the Central and
+Western regions hold close to 60% of them, each region is dominated by
+its main city, and overseas providers are almost all open-network or
+special-agreement. Everything is drawn with vectorized NumPy calls, so
+50,000 providers take under 0.1 s (reading the workbook takes seconds).
+
+Usage:
+    python scripts/generate_sample_data.py --providers synthetic --num-providers 20000
+    python scripts/synthetic_providers.py --count 20000 --output providers.xlsx
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from data_cache import read_excel_cached
+from provider_index import PROVIDER_COLUMNS
+
+# --providers value that selects the synthetic master
+SYNTHETIC = "synthetic"
+DEFAULT_PROVIDERS = 3500
+FIRST_PROV_CODE = 20000
+
+# Share of providers per network (Provider_Info(2).xlsx mix, plus "M. NWM" for the generator's NWM plan
+# network, which the master lacks; the weights are normalized when drawing)
+NETWORK_WEIGHTS = {
+    "J. ONW": 0.364, "I. SPA": 0.147, "L. NWS": 0.091, "K. IHC": 0.081, "N15": 0.078,
+    "H. NW7": 0.037, "F. NW5": 0.033, "B. NW1": 0.031, "M. NWM": 0.030, "D. NW3": 0.029, "A. NWR": 0.027,
+    "N14": 0.026, "G. NW6": 0.021, "C. NW2": 0.020, "E. NW4": 0.015,
+}
+
+# Overseas providers are contracted through the open network or special agreements
+OVERSEAS_NETWORK_WEIGHTS = {"J. ONW": 0.7, "I. SPA": 0.2, "H. NW7": 0.1}
+
+PRACTICE_WEIGHTS = {
+    "Polyclinic": 0.42, "Hospital": 0.18, "Dental": 0.11, "In-house Clinic": 0.08, "Clinic": 0.07,
+    "Optical": 0.04, "Home Healthcare": 0.02, "Physiotherapy Center": 0.02, "Eye Center": 0.01,
+    "Pharmacy": 0.01, "Laboratory": 0.04,
+}
+
+REGION_WEIGHTS = {"Central": 0.30, "Western": 0.29, "Eastern": 0.18, "Southern": 0.10, "Overseas": 0.09,
+                  "Northern": 0.04}
+
+# Towns per region with their share of the region's providers
+REGION_TOWNS = {
+    "Central": {"Riyadh": 0.76, "Buraidah": 0.07, "Hail": 0.04, "Al Kharj": 0.04, "Unaizah": 0.03,
+                "Al Majmaah": 0.03, "Al Zulfi": 0.03},
+    "Western": {"Jeddah": 0.63, "Makkah": 0.11, "Madinah": 0.10, "Taif": 0.08, "Yanbu": 0.05, "Rabigh": 0.03},
+    "Eastern": {"Dammam": 0.30, "Khobar": 0.17, "Al Ahsa": 0.11, "Jubail": 0.11, "Dhahran": 0.08,
+                "Qatif": 0.08, "Hafr Al Batin": 0.08, "Ras Tanura": 0.07},
+    "Southern": {"Najran": 0.17, "Khamis Mushayt": 0.16, "Abha": 0.15, "Jazan": 0.14, "Al Baha": 0.10,
+                 "Bisha": 0.10, "Sabya": 0.09, "Muhayil": 0.09},
+    "Overseas": {"India": 0.17, "Dubai, UAE": 0.14, "Germany": 0.13, "Bahrain": 0.12, "Egypt": 0.11,
+                 "Jordan": 0.10, "United Kingdom": 0.08, "Turkey": 0.08, "USA": 0.07},
+    "Northern": {"Tabuk": 0.40, "Arar": 0.18, "Qurayyat": 0.13, "Al Ula": 0.10, "Sakaka": 0.10, "Turaif": 0.09},
+}
+
+NAME_STEMS = [
+    "Al Noor", "Dallah", "Al Hammadi", "Saudi German", "Al Mouwasat", "Dr. Sulaiman Al Habib", "Al Salama",
+    "Al Hayat", "Al Shifa", "Care", "Al Rawdah", "Al Ahli", "Al Jazeera", "Magrabi", "Al Borg", "Al Mokhtabar",
+    "Nahdi", "Whites", "Yateem", "Al Zahra", "Al Amal", "Al Dawaa", "Al Andalus", "Al Takhassusi", "Riaya",
+    "Bait Al Shifa", "Al Wafa", "Al Hikma", "Abeer", "Al Saad", "Al Farabi", "Ibn Sina", "Al Razi",
+    "Al Rashid", "Al Ghad", "Kings", "Al Safwa", "Al Maarefa", "Al Resalah", "Ideal",
+]
+
+# Name suffix per practice
+PRACTICE_NAMES = {
+    "Polyclinic": "Medical Complex", "Hospital": "Hospital", "Dental": "Dental Center",
+    "In-house Clinic": "Company Clinic", "Clinic": "Clinics", "Optical": "Optics",
+    "Home Healthcare": "Home Care", "Physiotherapy Center": "Physiotherapy Center",
+    "Eye Center": "Eye Center", "Pharmacy": "Pharmacy", "Laboratory": "Medical Laboratories",
+}
+
+
+def _draw(rng, weights, size):
+    """`size` labels drawn with the given {label: weight} mix"""
+    labels = np.array(list(weights), dtype=object)
+    p = np.fromiter(weights.values(), dtype=float)
+    return labels[rng.choice(len(labels), size=size, p=p / p.sum())]
+
+
+def generate_providers(num_providers=DEFAULT_PROVIDERS, seed=7):
+    """Provider master DataFrame with PROVIDER_COLUMNS; the same (num_providers, seed) gives the same table"""
+    rng = np.random.default_rng(seed)
+    region = _draw(rng, REGION_WEIGHTS, num_providers)
+    town = np.empty(num_providers, dtype=object)
+    network = _draw(rng, NETWORK_WEIGHTS, num_providers)
+    for name, towns in REGION_TOWNS.items():
+        rows = np.flatnonzero(region == name)
+        town[rows] = _draw(rng, towns, len(rows))
+        if name == "Overseas":
+            network[rows] = _draw(rng, OVERSEAS_NETWORK_WEIGHTS, len(rows))
+
+    practice = _draw(rng, PRACTICE_WEIGHTS, num_providers)
+    stems = np.array(NAME_STEMS, dtype=object)[rng.integers(0, len(NAME_STEMS), num_providers)]
+    names = pd.Series(stems) + " " + pd.Series(practice).map(PRACTICE_NAMES) + " - " + pd.Series(town)
+
+    return pd.DataFrame({
+        "PROV_CODE": np.arange(FIRST_PROV_CODE, FIRST_PROV_CODE + num_providers),
+        "PROV_NAME": names.to_numpy(),
+        "PROVIDER_NETWORK": network,
+        "PROVIDER_PRACTICE": practice,
+        "PROVIDER_REGION": region,
+        "PROVIDER_TOWN": town,
+    })[PROVIDER_COLUMNS]
+
+
+def load_providers(source, num_providers=DEFAULT_PROVIDERS, seed=7):
+    """The synthetic master when source is SYNTHETIC, else the provider Excel at that path (cached parse)"""
+    if source == SYNTHETIC:
+        return generate_providers(num_providers, seed)
+    return read_excel_cached(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic provider master")
+    parser.add_argument("--count", type=int, default=DEFAULT_PROVIDERS,
+                        help=f"Number of providers (default: {DEFAULT_PROVIDERS})")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed (default: 7)")
+    parser.add_argument("--output", default="providers.csv", help="Output file, .csv or .xlsx (default: providers.csv)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    providers = generate_providers(args.count, args.seed)
+    print(f"Generated {len(providers):,} providers in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if os.path.splitext(args.output)[1] in (".xlsx", ".xls"):
+        providers.to_excel(args.output, index=False)
+    else:
+        providers.to_csv(args.output, index=False)
+    print(f"✓ Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from claims_audit import audit_claims, find_outliers
+
+
+def _claims():
+    # Two benefits with very different amount ranges; no claim is an outlier within its own benefit
+    amounts = {"DEN": [100, 110, 120, 130, 140], "PHY": [5000, 5100, 5200, 5300, 5400]}
+    rows = [(benefit, amount) for benefit, values in amounts.items() for amount in values]
+    return pd.DataFrame({
+        "CLAIM_ID": [f"CLM{i:03d}" for i in range(len(rows))],
+        "MBR_NO": [f"M{i}" for i in range(len(rows))],
+        "PROV_CODE": "P1",
+        "BENEFIT_CODE": pd.Series([benefit for benefit, _ in rows], dtype=object),
+        "CLAIM_DATE": "2024-03-01",
+        "CLAIMED_AMOUNT": [float(amount) for _, amount in rows],
+        "APPROVED_AMOUNT": 0.0,
+        "STATUS": "Approved",
+        "REJECTION_REASON": None,
+    })
+
+
+def test_find_outliers_ignores_missing_benefit_code():
+    benefit = np.array([-1, 0, 0, 0, 0, 1, 1, 1, 1])
+    amount = np.array([1e9, 10, 11, 12, 13, 1000, 1010, 1020, 1030], dtype=float)
+    for method in ("iqr", "zscore"):
+        rows, low, high = find_outliers(benefit, amount, method)
+        assert len(rows) == 0
+
+
+def test_missing_benefit_code_keeps_fences_of_other_benefits():
+    claims = _claims()
+    assert (audit_claims(claims)["FLAG"] == "AMOUNT_OUTLIER").sum() == 0
+
+    claims.loc[0, "BENEFIT_CODE"] = np.nan
+    audit = audit_claims(claims)
+    assert (audit["FLAG"] == "AMOUNT_OUTLIER").sum() == 0
+
+    # A real outlier is still labelled with its own benefit
+    claims.loc[5, "CLAIMED_AMOUNT"] = 90000.0
+    outliers = audit_claims(claims).query("FLAG == 'AMOUNT_OUTLIER'")
+    assert outliers["CLAIM_ID"].tolist() == ["CLM005"]
+    assert outliers["DETAIL"].str.endswith("for PHY").all()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from db_loader import DB_TABLES, DatabaseLoader, _rows, db_frame
+
+
+class RecordingCursor:
+    """Keeps the LOAD DATA statement and the temp file's contents (deleted right after execute)"""
+
+    def execute(self, sql, params):
+        self.sql = sql
+        with open(params[0], encoding="utf-8") as f:
+            self.lines = f.read().splitlines()
+
+
+def _load_infile(table, df):
+    loader = DatabaseLoader.__new__(DatabaseLoader)
+    loader.dialect = "mysql"
+    frame = db_frame(df, table)
+    cursor = RecordingCursor()
+    loader._load_infile(cursor, DB_TABLES[table], list(frame.columns), _rows(frame))
+    return cursor
+
+
+def test_infile_writes_missing_values_as_unenclosed_null():
+    claims = pd.DataFrame({
+        "CLAIM_ID": ["CLM1", "CLM2"],
+        "CLAIM_DATE": pd.to_datetime(["2024-01-05", "2024-01-06"]),
+        "DIAGNOSIS": ['Fracture "left" arm', "NULL"],
+        "APPROVED_AMOUNT": [120.5, np.nan],
+        "REJECTION_REASON": [None, "Duplicate claim"],
+        "PROCESSING_DAYS": [3.0, np.nan],
+    })
+    cursor = _load_infile("claims", claims)
+
+    assert "OPTIONALLY ENCLOSED BY '\"'" in cursor.sql
+    assert "ESCAPED BY ''" in cursor.sql
+    assert cursor.sql.endswith("(`claimId`, `claimDate`, `diagnosis`, `approvedAmount`, `rejectionReason`, "
+                               "`processingDays`)")
+    assert cursor.lines == [
+        '"CLM1","2024-01-05","Fracture ""left"" arm","120.5",NULL,"3.0"',
+        '"CLM2","2024-01-06","NULL",NULL,"Duplicate claim",NULL',
+    ]
+    assert not any("\\N" in line for line in cursor.lines)
@@ -0,0 +1,246 @@
+"""
+Referential-integrity, range and duplicate-key validation
+
+Checks a set of pipeline tables against the rules below and returns a
+violations report instead of trusting the inputs:
+
+- FOREIGN_KEYS: every child key exists in the parent table
+  (claims -> members -> corporate_clients, claims / pre-auths -> providers,
+  model outputs -> ivi_scores, ...)
+- PRIMARY_KEYS: key columns are unique
+- RANGES: scores within 0-100, amounts non-negative, and similar bounds
+
+Key checks are hash-based set operations (Series.isin / duplicated against
+a hash table of the parent keys), so validating a 500k-claim daily load
+takes a fraction of a second. Rules whose table or column is absent are
+skipped, which lets the same rules run over a full data directory, the
+generator's in-memory tables or a single batch file.
+
+Usage:
+    python scripts/validate_data.py --data-dir data
+    python scripts/validate_data.py --data-dir data --batch claims=claims_2025-01-02.csv --strict
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from pipeline_io import PARQUET_AVAILABLE, parquet_path, read_table
+
+# (child table, column, parent table, parent column)
+FOREIGN_KEYS = [
+    ("members", "CONT_NO", "corporate_clients", "CONT_NO"),
+    ("claims", "MBR_NO", "members", "MBR_NO"),
+    ("claims", "CONT_NO", "corporate_clients", "CONT_NO"),
+    ("claims", "PROV_CODE", "providers", "PROV_CODE"),
+    ("preauthorizations", "MBR_NO", "members", "MBR_NO"),
+    ("preauthorizations", "PROV_CODE", "providers", "PROV_CODE"),
+    ("calls", "MBR_NO", "members", "MBR_NO"),
+    ("ivi_scores", "CONT_NO", "corporate_clients", "CONT_NO"),
+    ("future_predictions", "CONT_NO", "ivi_scores", "CONT_NO"),
+    ("recommendations", "CONT_NO", "ivi_scores", "CONT_NO"),
+]
+
+PRIMARY_KEYS = {
+    "corporate_clients": ["CONT_NO"],
+    "members": ["MBR_NO"],
+    "claims": ["CLAIM_ID"],
+    "preauthorizations": ["PREAUTH_ID"],
+    "calls": ["CALL_ID"],
+    "providers": ["PROV_CODE"],
+    "ivi_scores": ["CONT_NO"],
+    "future_predictions": ["CONT_NO"],
+    "recommendations": ["CONT_NO"],
+}
+
+# (table, column, low, high); None = unbounded, missing values pass
+RANGES = [
+    ("ivi_scores", "H_SCORE", 0, 100),
+    ("ivi_scores", "E_SCORE", 0, 100),
+    ("ivi_scores", "U_SCORE", 0, 100),
+    ("ivi_scores", "IVI_SCORE", 0, 100),
+    ("ivi_scores", "TOTAL_CLAIMED", 0, None),
+    ("ivi_scores", "TOTAL_APPROVED", 0, None),
+    ("future_predictions", "FUTURE_IVI_SCORE", 0, 100),
+    ("corporate_clients", "PREMIUM_AMOUNT", 0, None),
+    ("members", "AGE", 0, 120),
+    ("claims", "CLAIMED_AMOUNT", 0, None),
+    ("claims", "APPROVED_AMOUNT", 0, None),
+    ("preauthorizations", "ESTIMATED_COST", 0, None),
+    ("calls", "SATISFACTION_SCORE", 1, 5),
+    ("calls", "RESOLUTION_TIME_HOURS", 0, None),
+]
+
+# Detail rows kept per rule in the violations table (counts are always complete)
+MAX_EXAMPLES = 1000
+
+SUMMARY_COLUMNS = ["TABLE", "CHECK", "RULE", "CHECKED", "VIOLATIONS"]
+VIOLATION_COLUMNS = ["TABLE", "CHECK", "RULE", "ROW", "VALUE"]
+
+REPORT_FILE = "validation_report.json"
+VIOLATIONS_FILE = "validation_violations.csv"
+
+
+def _key_values(series):
+    """Keys in a form that hashes equal across int / categorical / string copies of a column"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(series.cat.categories.dtype)
+    return series
+
+
+def _violations(table, check, rule, rows, values, checked, max_examples):
+    summary = {"TABLE": table, "CHECK": check, "RULE": rule, "CHECKED": int(checked), "VIOLATIONS": len(rows)}
+    detail = pd.DataFrame({
+        "TABLE": table,
+        "CHECK": check,
+        "RULE": rule,
+        "ROW": rows[:max_examples],
+        "VALUE": pd.Series(np.asarray(values)[:max_examples], dtype=object).astype(str).to_numpy(),
+    })
+    return summary, detail
+
+
+def check_foreign_keys(tables, max_examples=MAX_EXAMPLES):
+    for child, column, parent, parent_column in FOREIGN_KEYS:
+        if child not in tables or parent not in tables:
+            continue
+        if column not in tables[child] or parent_column not in tables[parent]:
+            continue
+        keys = _key_values(tables[child][column])
+        missing = ~keys.isin(_key_values(tables[parent][parent_column]).dropna().unique()) & keys.notna()
+        rows = np.flatnonzero(missing.to_numpy())
+        yield _violations(child, "foreign_key", f"{child}.{column} -> {parent}.{parent_column}", rows,
+                          keys.to_numpy()[rows], len(keys), max_examples)
+
+
+def check_primary_keys(tables, max_examples=MAX_EXAMPLES):
+    for table, columns in PRIMARY_KEYS.items():
+        if table not in tables or not all(c in tables[table] for c in columns):
+            continue
+        df = tables[table]
+        keys = _key_values(df[columns[0]]) if len(columns) == 1 else df[columns]
+        rows = np.flatnonzero(keys.duplicated(keep="first").to_numpy())
+        values = keys.to_numpy()[rows] if len(columns) == 1 else [tuple(r) for r in keys.to_numpy()[rows]]
+        yield _violations(table, "duplicate", f"{table}.{'+'.join(columns)} unique", rows, values, len(df),
+                          max_examples)
+
+
+def check_ranges(tables, max_examples=MAX_EXAMPLES):
+    for table, column, low, high in RANGES:
+        if table not in tables or column not in tables[table]:
+            continue
+        values = pd.to_numeric(tables[table][column], errors="coerce").to_numpy(dtype=float)
+        bad = np.zeros(len(values), dtype=bool)
+        if low is not None:
+            bad |= values < low
+        if high is not None:
+            bad |= values > high
+        rows = np.flatnonzero(bad)
+        bounds = f"{'' if low is None else low}..{'' if high is None else high}"
+        yield _violations(table, "range", f"{table}.{column} in {bounds}", rows, values[rows], len(values),
+                          max_examples)
+
+    # Approved amounts never exceed the claimed amount
+    claims = tables.get("claims")
+    if claims is not None and {"CLAIMED_AMOUNT", "APPROVED_AMOUNT"} <= set(claims.columns):
+        approved = claims["APPROVED_AMOUNT"].to_numpy(dtype=float)
+        rows = np.flatnonzero(approved > claims["CLAIMED_AMOUNT"].to_numpy(dtype=float) + 1e-6)
+        yield _violations("claims", "range", "claims.APPROVED_AMOUNT <= CLAIMED_AMOUNT", rows, approved[rows],
+                          len(claims), max_examples)
+
+
+def validate_tables(tables, max_examples=MAX_EXAMPLES):
+    """
+    Run every applicable rule over {table name: DataFrame}.
+    Returns (summary, violations) DataFrames; summary has one row per rule run.
+    """
+    summaries, details = [], []
+    for check in (check_foreign_keys, check_primary_keys, check_ranges):
+        for summary, detail in check(tables, max_examples):
+            summaries.append(summary)
+            if len(detail):
+                details.append(detail)
+
+    summary = pd.DataFrame(summaries, columns=SUMMARY_COLUMNS)
+    violations = pd.concat(details, ignore_index=True) if details else pd.DataFrame(columns=VIOLATION_COLUMNS)
+    return summary, violations
+
+
+def save_report(summary, violations, output_dir, tables=None):
+    """validation_report.json (rule counts) and validation_violations.csv (example rows)"""
+    report = {
+        "validated_at": datetime.now().isoformat(),
+        "tables": {name: len(df) for name, df in (tables or {}).items()},
+        "rules": len(summary),
+        "violations": int(summary["VIOLATIONS"].sum()),
+        "failed_rules": summary[summary["VIOLATIONS"] > 0].to_dict(orient="records"),
+        "passed_rules": summary.loc[summary["VIOLATIONS"] == 0, "RULE"].tolist(),
+    }
+    with open(os.path.join(output_dir, REPORT_FILE), "w") as f:
+        json.dump(report, f, indent=2)
+    violations.to_csv(os.path.join(output_dir, VIOLATIONS_FILE), index=False)
+    return report
+
+
+def print_summary(summary):
+    failed = summary[summary["VIOLATIONS"] > 0]
+    print(f"Validated {len(summary)} rules: {len(failed)} with violations")
+    for row in failed.itertuples():
+        print(f"  ✗ {row.RULE}: {row.VIOLATIONS:,} of {row.CHECKED:,} rows")
+
+
+def load_tables(data_dir, providers_path=None, batches=None):
+    """Every rule table present in data_dir (Parquet or CSV), with batch files replacing tables"""
+    names = {name for rule in FOREIGN_KEYS for name in (rule[0], rule[2])} | set(PRIMARY_KEYS)
+    tables = {}
+    for name in sorted(names):
+        if (PARQUET_AVAILABLE and os.path.exists(parquet_path(data_dir, name))) \
+                or os.path.exists(os.path.join(data_dir, f"{name}.csv")):
+            tables[name] = read_table(name, data_dir)
+
+    if providers_path:
+        from data_cache import read_excel_cached
+        tables["providers"] = read_excel_cached(providers_path)
+
+    for name, path in (batches or {}).items():
+        tables[name] = pd.read_json(path) if path.endswith(".json") else pd.read_csv(path)
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate IVI pipeline tables")
+    parser.add_argument("--data-dir", default="data", help="Directory with the pipeline tables (default: data)")
+    parser.add_argument("--providers", default=None, help="Provider master Excel (default: <data-dir>/providers.csv)")
+    parser.add_argument("--batch", action="append", default=[], metavar="TABLE=PATH",
+                        help="Validate this file in place of a table, e.g. claims=claims_2025-01-02.csv")
+    parser.add_argument("--output-dir", default=None, help="Where to write the report (default: --data-dir)")
+    parser.add_argument("--max-examples", type=int, default=MAX_EXAMPLES,
+                        help=f"Violating rows listed per rule (default: {MAX_EXAMPLES})")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 when any rule is violated")
+    args = parser.parse_args()
+
+    batches = dict(item.split("=", 1) for item in args.batch)
+    tables = load_tables(args.data_dir, args.providers, batches)
+
+    start = time.perf_counter()
+    summary, violations = validate_tables(tables, args.max_examples)
+    print(f"Checked {sum(len(df) for df in tables.values()):,} rows in {len(tables)} tables "
+          f"in {time.perf_counter() - start:.2f}s")
+    print_summary(summary)
+
+    output_dir = args.output_dir or args.data_dir
+    os.makedirs(output_dir, exist_ok=True)
+    report = save_report(summary, violations, output_dir, tables)
+    print(f"✓ Saved: {os.path.join(output_dir, REPORT_FILE)}")
+
+    if args.strict and report["violations"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()